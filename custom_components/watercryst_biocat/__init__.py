@@ -1,151 +1,105 @@
 """Watercryst Biocat Integration."""
 import logging
-import aiohttp
+import time
+from homeassistant.components import webhook
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_WEBHOOK_ID
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from datetime import datetime, timedelta
+import homeassistant.helpers.config_validation as cv
 
-DOMAIN = "watercryst_biocat"
+from .consumption import consumption_store
+from .const import DOMAIN
+from .coordinator import WatercrystCoordinator, snapshot_store
+from .push import async_register_push
+from .scheduler import async_get_scheduler
+from .services import async_setup_services
+
+PLATFORMS = ["sensor", "binary_sensor", "switch", "button"]
 
 _LOGGER = logging.getLogger(__name__)
 
-# Globale Variablen für die Berechnung
-last_cumulative_value = None
-daily_reset_time = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-weekly_reset_time = daily_reset_time - timedelta(days=daily_reset_time.weekday())
-monthly_reset_time = daily_reset_time.replace(day=1)
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-daily_consumption = 0
-weekly_consumption = 0
-monthly_consumption = 0
+async def async_setup(hass: HomeAssistant, config):
+    """Set up the Watercryst Biocat services."""
+    async_setup_services(hass)
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up Watercryst Biocat from a config entry."""
+    setup_start = time.perf_counter()
     hass.data.setdefault(DOMAIN, {})
 
     # Lese den API-Schlüssel aus der Konfiguration
     api_key = entry.data["api_key"]
 
-    # Erstelle einen DataUpdateCoordinator
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="Watercryst Biocat",
-        update_method=lambda: async_update_data(api_key),
-        update_interval=timedelta(seconds=30),
-    )
+    # Webhook für Push-Updates (ältere Einträge erhalten ihn hier)
+    if CONF_WEBHOOK_ID not in entry.data:
+        hass.config_entries.async_update_entry(
+            entry, data={**entry.data, CONF_WEBHOOK_ID: webhook.async_generate_id()}
+        )
+
+    # Ein gemeinsamer API-Client (Verbindungspool) pro API-Schlüssel
+    scheduler = async_get_scheduler(hass)
+    client = scheduler.async_get_client(api_key)
+
+    # Erstelle den Coordinator (eigene Abfrageintervalle pro Endpunkt)
+    coordinator = WatercrystCoordinator(hass, entry, client, scheduler)
 
-    await coordinator.async_config_entry_first_refresh()
+    # Gespeicherten Verbrauch wiederherstellen, bevor die erste Abfrage läuft
+    await coordinator.consumption.async_load()
+
+    # Mit dem letzten bekannten Zustand starten und die erste Abfrage im
+    # Hintergrund ausführen; nur ohne gespeicherten Zustand darauf warten
+    coordinator.startup["restored"] = await coordinator.async_restore()
+    if coordinator.startup["restored"]:
+        entry.async_create_background_task(
+            hass, coordinator.async_first_refresh(), "watercryst_biocat first refresh"
+        )
+    else:
+        try:
+            await coordinator.async_first_refresh()
+        except Exception:
+            scheduler.async_unregister_entry(entry.entry_id)
+            await scheduler.async_release_client(api_key)
+            raise
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
+    async_register_push(hass, entry, coordinator)
+
+    # Stündlichen Verbrauch in die Langzeitstatistik übernehmen (optional, nur mit Recorder)
+    if "recorder" in hass.config.components:
+        from .backfill import WatercrystStatisticsImporter
+
+        WatercrystStatisticsImporter(hass, entry, client).async_start(entry)
 
     # Weiterleitung an die Plattformen
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor", "switch", "button"])
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+
+    # Bei geänderten Optionen (Intervalle) neu laden
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    coordinator.startup["setup_ms"] = round((time.perf_counter() - setup_start) * 1000, 1)
+    _LOGGER.debug("Set up %s in %.1f ms", entry.title, coordinator.startup["setup_ms"])
     return True
 
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload a config entry after its options changed."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Unload a config entry."""
-    if unload_ok := await hass.config_entries.async_forward_entry_unload(entry, "sensor"):
-        hass.data[DOMAIN].pop(entry.entry_id)
+    if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.consumption.async_save()
+        await coordinator.async_save_snapshot()
+        # Befehlswarteschlange beenden, bevor der gemeinsame Client geschlossen wird
+        await coordinator.async_shutdown()
+        await async_get_scheduler(hass).async_release_client(entry.data["api_key"])
 
     return unload_ok
 
-async def async_update_data(api_key):
-    """Fetch data from the API."""
-    from .sensor import fetch_data, fetch_state_data, fetch_measurements_data
-    global last_cumulative_value, daily_reset_time, weekly_reset_time, monthly_reset_time
-    global daily_consumption, weekly_consumption, monthly_consumption
-
-    _LOGGER.debug("Starting data update...")
-
-    # Abrufen der Daten von allen APIs
-    cumulative_data = await fetch_data(api_key)
-    state_data = await fetch_state_data(api_key)
-    measurements_data = await fetch_measurements_data(api_key)
-
-    if cumulative_data is not None and state_data is not None and measurements_data is not None:
-        _LOGGER.debug(
-            "Data fetched successfully: cumulative=%s, state=%s, measurements=%s",
-            cumulative_data, state_data, measurements_data
-        )
-
-        # Berechnung des täglichen, wöchentlichen und monatlichen Verbrauchs
-        now = datetime.now()
-        if now >= daily_reset_time + timedelta(days=1):
-            daily_reset_time = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            daily_consumption = 0
-
-        if now >= weekly_reset_time + timedelta(weeks=1):
-            weekly_reset_time = daily_reset_time - timedelta(days=daily_reset_time.weekday())
-            weekly_consumption = 0
-
-        if now >= monthly_reset_time + timedelta(days=31):
-            monthly_reset_time = now.replace(day=1)
-            monthly_consumption = 0
-
-        if last_cumulative_value is not None:
-            delta = cumulative_data - last_cumulative_value
-            daily_consumption += delta
-            weekly_consumption += delta
-            monthly_consumption += delta
-
-        last_cumulative_value = cumulative_data
-
-        return {
-            "cumulativeWaterConsumption": cumulative_data,
-            "dailyWaterConsumption": daily_consumption,
-            "weeklyWaterConsumption": weekly_consumption,
-            "monthlyWaterConsumption": monthly_consumption,
-            "online": state_data.get("online"),
-            "mode": state_data.get("mode", {}).get("name"),
-            "mlState": state_data.get("mlState"),
-            "absenceModeEnabled": state_data.get("waterProtection", {}).get("absenceModeEnabled"),
-            "pauseLeakageProtectionUntilUTC": state_data.get("waterProtection", {}).get("pauseLeakageProtectionUntilUTC"),
-            "waterTemp": measurements_data.get("waterTemp"),
-            "pressure": measurements_data.get("pressure"),
-            "flowRate": measurements_data.get("flowRate"),
-            "lastWaterTapVolume": measurements_data.get("lastWaterTapVolume"),
-            "lastWaterTapDuration": measurements_data.get("lastWaterTapDuration"),
-        }
-    _LOGGER.warning("Failed to fetch data from one or more APIs.")
-    return {}
-
-async def fetch_data(api_key):
-    """Fetch data from the Watercryst Biocat API."""
-    headers = {"accept": "application/json", "x-api-key": api_key}
-    url = "https://appapi.watercryst.com/v1/statistics/cumulative/daily"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.text()  # API gibt nur einen Wert zurück, kein JSON
-                _LOGGER.debug("Fetched data from API: %s", data)
-                return float(data)  # Konvertiere den Wert in eine Zahl
-        except aiohttp.ClientResponseError as e:
-            _LOGGER.error("Error fetching data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
-            return None
-        except Exception as e:
-            _LOGGER.error("Unexpected error: %s", e)
-            return None
-
-async def fetch_state_data(api_key):
-    """Fetch state data from the Watercryst Biocat API."""
-    headers = {"accept": "application/json", "x-api-key": api_key}
-    url = "https://appapi.watercryst.com/v1/state"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            _LOGGER.debug("Sending request to API: %s", url)
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()  # API gibt JSON zurück
-                _LOGGER.debug("Fetched state data from API: %s", data)
-                return data
-        except aiohttp.ClientResponseError as e:
-            _LOGGER.error("Error fetching state data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
-            return None
-        except Exception as e:
-            _LOGGER.error("Unexpected error: %s", e)
-            return None
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Remove the stored data of a config entry."""
+    await consumption_store(hass, entry.entry_id).async_remove()
+    await snapshot_store(hass, entry.entry_id).async_remove()
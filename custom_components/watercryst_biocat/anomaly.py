@@ -0,0 +1,130 @@
+"""Local leak anomaly detection for Watercryst Biocat."""
+import math
+
+# Dauerdurchfluss: geringer Durchfluss (L/min) über mindestens diese Zeit (s)
+LOW_FLOW_MAX = 1.0
+LOW_FLOW_DURATION = 600
+
+# Druckabfall bei geschlossenen Zapfstellen gegenüber dem gleitenden Mittel
+PRESSURE_ALPHA = 0.05
+PRESSURE_MIN_SAMPLES = 20
+PRESSURE_SIGMA = 4.0
+PRESSURE_DECAY_MIN = 0.2
+
+# Ungewöhnlicher Verbrauch eines Zapfvorgangs gegenüber dem gleitenden Mittel
+CONSUMPTION_ALPHA = 0.05
+CONSUMPTION_MIN_SAMPLES = 20
+CONSUMPTION_SIGMA = 4.0
+CONSUMPTION_EXCESS_MIN = 10.0
+
+
+class Ewma:
+    """Exponentially weighted moving mean and variance, O(1) per sample."""
+
+    __slots__ = ("alpha", "mean", "variance", "count")
+
+    def __init__(self, alpha):
+        """Initialize empty statistics."""
+        self.alpha = alpha
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+
+    @property
+    def std(self):
+        """Return the standard deviation."""
+        return math.sqrt(self.variance)
+
+    def update(self, value):
+        """Add a sample."""
+        if not self.count:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = self.alpha * diff
+            self.mean += increment
+            self.variance = (1 - self.alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class WatercrystLeakDetector:
+    """Streaming leak detection over the polled measurements.
+
+    Three checks run on every measurements poll:
+
+    * continuous flow: a low flow rate that never drops to zero for
+      LOW_FLOW_DURATION seconds, typical for a dripping tap or a running
+      toilet cistern;
+    * pressure decay: while no water flows, the pressure falls clearly
+      below its moving average;
+    * unusual consumption: a tap event whose volume is far above the
+      moving average of previous tap events.
+
+    Anomalous samples are not added to the moving statistics, so a leak
+    does not become the new baseline while it lasts.
+    """
+
+    def __init__(self):
+        """Initialize the detector."""
+        self.pressure = Ewma(PRESSURE_ALPHA)
+        self.tap_volume = Ewma(CONSUMPTION_ALPHA)
+        self._low_flow_since = None
+        self.continuous_flow = False
+        self.pressure_decay = False
+        self.unusual_consumption = False
+
+    def update(self, data, timestamp, new_tap):
+        """Run the checks on a measurements poll and store the results in data."""
+        flow_rate = data.flow_rate
+        if isinstance(flow_rate, (int, float)):
+            if 0 < flow_rate <= LOW_FLOW_MAX:
+                if self._low_flow_since is None:
+                    self._low_flow_since = timestamp
+            else:
+                self._low_flow_since = None
+            self.continuous_flow = (
+                self._low_flow_since is not None
+                and timestamp - self._low_flow_since >= LOW_FLOW_DURATION
+            )
+            # Bei geöffneter Zapfstelle fällt der Druck ohnehin ab
+            if flow_rate == 0 and isinstance(data.pressure, (int, float)):
+                self.pressure_decay = self._check_pressure(data.pressure)
+
+        if new_tap and isinstance(data.last_water_tap_volume, (int, float)):
+            self.unusual_consumption = self._check_tap_volume(data.last_water_tap_volume)
+
+        data.continuous_flow = self.continuous_flow
+        data.pressure_decay = self.pressure_decay
+        data.unusual_consumption = self.unusual_consumption
+
+    def _check_pressure(self, pressure):
+        """Return whether the pressure fell clearly below its average."""
+        stats = self.pressure
+        if stats.count >= PRESSURE_MIN_SAMPLES:
+            drop = stats.mean - pressure
+            if drop > max(PRESSURE_DECAY_MIN, PRESSURE_SIGMA * stats.std):
+                return True
+        stats.update(pressure)
+        return False
+
+    def _check_tap_volume(self, volume):
+        """Return whether a tap volume is far above the average."""
+        stats = self.tap_volume
+        if stats.count >= CONSUMPTION_MIN_SAMPLES:
+            excess = volume - stats.mean
+            if excess > max(CONSUMPTION_EXCESS_MIN, CONSUMPTION_SIGMA * stats.std):
+                return True
+        stats.update(volume)
+        return False
+
+    def as_dict(self):
+        """Return the state of the moving statistics."""
+        return {
+            "pressure_mean": self.pressure.mean,
+            "pressure_std": self.pressure.std,
+            "pressure_samples": self.pressure.count,
+            "tap_volume_mean": self.tap_volume.mean,
+            "tap_volume_std": self.tap_volume.std,
+            "tap_volume_samples": self.tap_volume.count,
+            "low_flow_since": self._low_flow_since,
+        }
@@ -0,0 +1,391 @@
+"""API client for the Watercryst Biocat cloud API."""
+import asyncio
+import logging
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+import aiohttp
+
+from .metrics import RequestMetrics
+from .models import ApiSnapshot, MeasurementsSnapshot, StateSnapshot, json_loads, parse_events, parse_statistics
+
+_LOGGER = logging.getLogger(__name__)
+
+API_BASE_URL = "https://appapi.watercryst.com/v1"
+
+ENDPOINT_CUMULATIVE = "cumulative"
+ENDPOINT_STATE = "state"
+ENDPOINT_MEASUREMENTS = "measurements"
+ENDPOINT_EVENTS = "events"
+
+ENDPOINTS = (ENDPOINT_CUMULATIVE, ENDPOINT_STATE, ENDPOINT_MEASUREMENTS, ENDPOINT_EVENTS)
+
+# Ereignisse ab einem Zeitpunkt (Parameter since, ISO 8601) und Quittierung einzelner
+# Ereignisse (Parameter eventId). Nicht öffentlich dokumentiert; angenommen, siehe parse_events
+ENDPOINT_PATHS = {
+    ENDPOINT_CUMULATIVE: "/statistics/cumulative/daily",
+    ENDPOINT_STATE: "/state",
+    ENDPOINT_MEASUREMENTS: "/measurements/direct",
+    ENDPOINT_EVENTS: "/events",
+}
+ACK_EVENT_PATH = "/ackevent"
+
+# Angenommene Endpunkte: HTTP 404 heißt, dass die API sie nicht anbietet
+OPTIONAL_ENDPOINTS = (ENDPOINT_EVENTS,)
+
+# Stündliche Zählerstände über einen Zeitraum (Parameter from/to, ISO 8601 UTC).
+# Nicht öffentlich dokumentiert; Pfad und Antwortformat sind angenommen, siehe parse_statistics
+STATISTICS_HOURLY_PATH = "/statistics/cumulative/hourly"
+# Name in WatercrystApiClient.unsupported, wenn die API ihn nicht anbietet
+STATISTICS = "statistics"
+STATISTICS_TIMEOUT = 30
+
+# Zeitlimit pro Endpunkt in Sekunden
+ENDPOINT_TIMEOUTS = {
+    ENDPOINT_CUMULATIVE: 10,
+    ENDPOINT_STATE: 10,
+    ENDPOINT_MEASUREMENTS: 10,
+    ENDPOINT_EVENTS: 10,
+}
+
+# Antworten werden so lange (Sekunden) wiederverwendet, gleichzeitige Anfragen zusammengefasst
+CACHE_TTL = 2
+
+# Verbindungspool: wenige, wiederverwendete Verbindungen zu einem einzigen Host
+CONNECTION_LIMIT = 4
+KEEPALIVE_TIMEOUT = 60
+DNS_CACHE_TTL = 300
+REQUEST_TIMEOUT = 15
+
+
+class WatercrystApiError(Exception):
+    """Error talking to the Watercryst API."""
+
+
+class WatercrystCommandRejected(WatercrystApiError):
+    """The API rejected a command; retrying will not help."""
+
+
+class WatercrystRateLimitError(WatercrystApiError):
+    """The API answered with HTTP 429."""
+
+    def __init__(self, retry_after=None):
+        """Initialize with the server's Retry-After delay in seconds, if any."""
+        super().__init__(f"Rate limited, retry after {retry_after} s")
+        self.retry_after = retry_after
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+class WatercrystApiClient:
+    """Client for the Watercryst Biocat API.
+
+    One client exists per API key. It owns a single pooled aiohttp
+    session with keep-alive and DNS caching which is shared by the
+    coordinator and all entities, so polls and commands reuse open
+    connections instead of doing a new TCP/TLS handshake every time.
+
+    Endpoint fetches go through a short TTL cache. Callers asking for an
+    endpoint while a request for it is in flight share that request and
+    its parsed result. Successful commands invalidate the cache.
+
+    Endpoint requests are conditional when the server sent an ETag or a
+    Last-Modified header before. On HTTP 304 the previous result object is
+    returned as is, without reading or parsing a body, so callers can tell
+    an unchanged endpoint by identity.
+
+    Events are fetched incrementally from event_cursor, the timestamp of
+    the newest event the caller has seen. An optional endpoint the API
+    answers with HTTP 404 is added to unsupported and logged once; callers
+    should stop requesting it. The same holds for the statistics
+    (STATISTICS).
+
+    Every endpoint request is measured in metrics (timings, outcome and
+    bytes received). With a ResponseRecorder as recorder, the raw body of
+    every endpoint response is recorded as well.
+
+    Commands should be sent through WatercrystCommandQueue, which retries
+    and serializes them. Their URLs are built with command_url(), so they
+    go to the same base URL as the endpoints (e.g. the mock API).
+    """
+
+    def __init__(self, api_key, base_url=API_BASE_URL):
+        """Initialize the client."""
+        self._headers = {"accept": "application/json", "x-api-key": api_key}
+        self._base_url = base_url
+        self._urls = {
+            endpoint: f"{base_url}{path}" for endpoint, path in ENDPOINT_PATHS.items()
+        }
+        self._session = None
+        self._closed = False
+        self._cache = {}
+        self._inflight = {}
+        self._validators = {}
+        self.event_cursor = None
+        self.unsupported = set()
+        self.recorder = None
+        self.cache_stats = {"hits": 0, "misses": 0, "coalesced": 0}
+        self.metrics = RequestMetrics()
+
+    def _get_session(self):
+        """Return the pooled session, creating it on first use.
+
+        Raises WatercrystApiError once the client was closed, so a late
+        request cannot open a session that is never closed again.
+        """
+        if self._closed:
+            raise WatercrystApiError("API client is closed")
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=CONNECTION_LIMIT,
+                limit_per_host=CONNECTION_LIMIT,
+                ttl_dns_cache=DNS_CACHE_TTL,
+                keepalive_timeout=KEEPALIVE_TIMEOUT,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self._headers,
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+                trace_configs=[self.metrics.trace_config()],
+            )
+        return self._session
+
+    async def close(self):
+        """Close the pooled session for good."""
+        self._closed = True
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _conditional_headers(self, endpoint):
+        """Return the validator headers for a conditional request of an endpoint."""
+        if (validators := self._validators.get(endpoint)) is None:
+            return None
+        etag, last_modified, _ = validators
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def _not_modified(self, endpoint, response):
+        """Return the previous result of an endpoint if the response is HTTP 304."""
+        if response.status != 304 or (validators := self._validators.get(endpoint)) is None:
+            return None
+        _LOGGER.debug("%s data not modified", endpoint)
+        return validators[2]
+
+    def _remember(self, endpoint, response, result):
+        """Keep the validators of a response together with its parsed result."""
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            self._validators[endpoint] = (etag, last_modified, result)
+        else:
+            self._validators.pop(endpoint, None)
+        return result
+
+    async def fetch_data(self):
+        """Fetch the cumulative daily consumption."""
+        url = self._urls[ENDPOINT_CUMULATIVE]
+        try:
+            _LOGGER.debug("Sending request to API: %s", url)
+            async with self._get_session().get(
+                url, headers=self._conditional_headers(ENDPOINT_CUMULATIVE), trace_request_ctx=ENDPOINT_CUMULATIVE
+            ) as response:
+                if (previous := self._not_modified(ENDPOINT_CUMULATIVE, response)) is not None:
+                    return previous
+                response.raise_for_status()
+                data = await response.read()  # API gibt nur einen Wert zurück, kein JSON
+                self.metrics.endpoint(ENDPOINT_CUMULATIVE).bytes += len(data)
+                if self.recorder is not None:
+                    self.recorder.record(ENDPOINT_CUMULATIVE, data)
+                _LOGGER.debug("Fetched cumulative data from API: %s", data)
+                return self._remember(ENDPOINT_CUMULATIVE, response, float(data))  # Konvertiere den Wert in eine Zahl
+        except aiohttp.ClientResponseError as e:
+            _LOGGER.error("Error fetching data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
+            return None
+        except Exception as e:
+            _LOGGER.error("Unexpected error: %s", e)
+            return None
+
+    async def fetch_state_data(self):
+        """Fetch state data as a StateSnapshot."""
+        return await self._fetch_json(ENDPOINT_STATE, StateSnapshot)
+
+    async def fetch_measurements_data(self):
+        """Fetch measurement data as a MeasurementsSnapshot."""
+        return await self._fetch_json(ENDPOINT_MEASUREMENTS, MeasurementsSnapshot)
+
+    async def fetch_events(self, since=None):
+        """Fetch the events at or after since as a list of DeviceEvents."""
+        params = {"since": since.isoformat()} if since is not None else None
+        return await self._fetch_json(ENDPOINT_EVENTS, parse_events, params)
+
+    def command_url(self, path):
+        """Return the URL of a command path relative to the API base URL."""
+        return f"{self._base_url}{path}"
+
+    def ack_event_url(self, event_id=None):
+        """Return the command URL acknowledging an event, or the current one without an id."""
+        url = self.command_url(ACK_EVENT_PATH)
+        if event_id is not None:
+            url = f"{url}?eventId={quote(str(event_id), safe='')}"
+        return url
+
+    async def fetch_all(self, endpoints=ENDPOINTS):
+        """Fetch several endpoints concurrently.
+
+        Returns a dict mapping each endpoint to its result. Every endpoint
+        has its own timeout, so a slow or failing endpoint only yields None
+        for itself instead of discarding the other results.
+        """
+        results = await asyncio.gather(
+            *(self._fetch_endpoint(endpoint) for endpoint in endpoints)
+        )
+        return dict(zip(endpoints, results))
+
+    async def fetch_snapshot(self, endpoints=ENDPOINTS):
+        """Fetch several endpoints concurrently into one ApiSnapshot."""
+        return ApiSnapshot(await self.fetch_all(endpoints))
+
+    async def _fetch_endpoint(self, endpoint):
+        """Fetch a single endpoint through the cache."""
+        cached = self._cache.get(endpoint)
+        if cached is not None and time.monotonic() - cached[0] < CACHE_TTL:
+            self.cache_stats["hits"] += 1
+            return cached[1]
+
+        if (task := self._inflight.get(endpoint)) is not None:
+            self.cache_stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        self.cache_stats["misses"] += 1
+        task = asyncio.get_running_loop().create_task(self._fetch_endpoint_uncached(endpoint))
+        self._inflight[endpoint] = task
+        task.add_done_callback(lambda _: self._inflight.pop(endpoint, None))
+        return await asyncio.shield(task)
+
+    def invalidate_cache(self):
+        """Drop all cached responses."""
+        self._cache.clear()
+
+    async def _fetch_endpoint_uncached(self, endpoint):
+        """Fetch a single endpoint, bounded by its timeout."""
+        fetch = {
+            ENDPOINT_CUMULATIVE: self.fetch_data,
+            ENDPOINT_STATE: self.fetch_state_data,
+            ENDPOINT_MEASUREMENTS: self.fetch_measurements_data,
+            ENDPOINT_EVENTS: lambda: self.fetch_events(self.event_cursor),
+        }[endpoint]
+        metrics = self.metrics.endpoint(endpoint)
+        previous = self._validators.get(endpoint, (None, None, None))[2]
+        start = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fetch(), ENDPOINT_TIMEOUTS[endpoint])
+        except asyncio.TimeoutError:
+            _LOGGER.warning("Timeout fetching %s data from API", endpoint)
+            metrics.outcomes["timeout"] += 1
+            return None
+        finally:
+            metrics.total.observe((time.perf_counter() - start) * 1000)
+        if result is None:
+            metrics.outcomes["error"] += 1
+            return None
+        metrics.outcomes["not_modified" if result is previous else "success"] += 1
+        self._cache[endpoint] = (time.monotonic(), result)
+        return result
+
+    async def _fetch_json(self, endpoint, model, params=None):
+        """Fetch the JSON document of an endpoint and parse it into a model."""
+        url = self._urls[endpoint]
+        try:
+            _LOGGER.debug("Sending request to API: %s", url)
+            async with self._get_session().get(
+                url, params=params, headers=self._conditional_headers(endpoint), trace_request_ctx=endpoint
+            ) as response:
+                # Unverändert: weder lesen noch dekodieren
+                if (previous := self._not_modified(endpoint, response)) is not None:
+                    return previous
+                response.raise_for_status()
+                body = await response.read()
+            self.metrics.endpoint(endpoint).bytes += len(body)
+            if self.recorder is not None:
+                self.recorder.record(endpoint, body)
+            # Nur einmal dekodieren und direkt in das Modell übernehmen
+            data = model(json_loads(body))
+            _LOGGER.debug("Fetched %s data from API (%s bytes)", endpoint, len(body))
+            return self._remember(endpoint, response, data)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404 and endpoint in OPTIONAL_ENDPOINTS:
+                if endpoint not in self.unsupported:
+                    _LOGGER.info("The API does not provide %s data (%s), no longer requesting it", endpoint, e.request_info.url)
+                    self.unsupported.add(endpoint)
+                return None
+            _LOGGER.error("Error fetching %s data from API: %s, status: %s, url: %s", endpoint, e.message, e.status, e.request_info.url)
+            return None
+        except Exception as e:
+            _LOGGER.error("Unexpected error: %s", e)
+            return None
+
+    async def fetch_statistics(self, start, end):
+        """Fetch the hourly cumulative consumption from start to end.
+
+        Returns a list of (hour start, cumulative value) tuples, or None if
+        the request failed. On HTTP 404 STATISTICS is added to unsupported.
+        """
+        url = f"{self._base_url}{STATISTICS_HOURLY_PATH}"
+        params = {"from": start.isoformat(), "to": end.isoformat()}
+        try:
+            _LOGGER.debug("Fetching statistics from %s to %s", params["from"], params["to"])
+            async with self._get_session().get(
+                url, params=params, timeout=aiohttp.ClientTimeout(total=STATISTICS_TIMEOUT)
+            ) as response:
+                response.raise_for_status()
+                body = await response.read()
+            return parse_statistics(json_loads(body))
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                if STATISTICS not in self.unsupported:
+                    _LOGGER.info("The API does not provide hourly statistics (%s)", e.request_info.url)
+                    self.unsupported.add(STATISTICS)
+                return None
+            _LOGGER.error("Error fetching statistics from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
+            return None
+        except Exception as e:
+            _LOGGER.error("Unexpected error: %s", e)
+            return None
+
+    async def post_command(self, url):
+        """Send a command to the API.
+
+        Raises WatercrystRateLimitError on HTTP 429, WatercrystCommandRejected
+        on other client errors and WatercrystApiError if the request failed
+        in a way that may succeed when retried.
+        """
+        try:
+            async with self._get_session().post(url) as response:
+                if response.status == 429:
+                    raise WatercrystRateLimitError(parse_retry_after(response.headers.get("Retry-After")))
+                if 400 <= response.status < 500:
+                    raise WatercrystCommandRejected(f"HTTP {response.status} for {url}")
+                response.raise_for_status()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise WatercrystApiError(f"Failed to send command to {url}: {e}") from e
+        _LOGGER.debug("Successfully sent command to %s", url)
+        # Der Befehl ändert den Gerätezustand
+        self.invalidate_cache()
@@ -0,0 +1,120 @@
+"""Long-term statistics backfill for Watercryst Biocat."""
+import asyncio
+from datetime import timedelta
+import logging
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    get_last_statistics,
+)
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .api import STATISTICS
+from .const import DOMAIN
+from .rollups import consumption_delta
+
+_LOGGER = logging.getLogger(__name__)
+
+# Zeitraum, der beim ersten Import nachgeladen wird
+BACKFILL_DAYS = 30
+
+# Zeitraum pro Abfrage der Statistik-API
+BATCH_DAYS = 7
+
+IMPORT_INTERVAL = timedelta(hours=1)
+
+
+def statistic_id(entry_id):
+    """Return the external statistic ID of a config entry."""
+    return f"{DOMAIN}:water_consumption_{entry_id.lower()}"
+
+
+class WatercrystStatisticsImporter:
+    """Imports the hourly consumption into the recorder's long-term statistics.
+
+    Each run continues after the last imported hour (or BACKFILL_DAYS back
+    on the first run) and fetches complete hours up to now in batches of
+    BATCH_DAYS, so gaps caused by downtime are filled from the cloud's
+    own statistics instead of sampled sensor states. The running sum
+    treats a decreasing counter as a reset. If the API does not provide
+    the hourly statistics, the importer stops for good.
+    """
+
+    def __init__(self, hass, entry, client):
+        """Initialize the importer."""
+        self._hass = hass
+        self._client = client
+        self._lock = asyncio.Lock()
+        self._unsub_interval = None
+        self.statistic_id = statistic_id(entry.entry_id)
+        self._metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"{entry.title} Wasserverbrauch",
+            source=DOMAIN,
+            statistic_id=self.statistic_id,
+            unit_of_measurement=UnitOfVolume.LITERS,
+        )
+
+    @callback
+    def async_start(self, entry):
+        """Import now and then every IMPORT_INTERVAL until the entry unloads."""
+        entry.async_create_background_task(self._hass, self.async_import(), "watercryst_biocat statistics import")
+        self._unsub_interval = async_track_time_interval(self._hass, self._async_import_interval, IMPORT_INTERVAL)
+        entry.async_on_unload(self.async_stop)
+
+    @callback
+    def async_stop(self):
+        """Stop the periodic import."""
+        if self._unsub_interval is not None:
+            self._unsub_interval()
+            self._unsub_interval = None
+
+    async def _async_import_interval(self, now):
+        """Run the periodic import."""
+        await self.async_import()
+
+    async def async_import(self):
+        """Import all complete hours since the last imported one."""
+        if self._lock.locked():
+            return
+        if STATISTICS in self._client.unsupported:
+            # Ein anderer Eintrag mit demselben Client hat es schon festgestellt
+            self.async_stop()
+            return
+        async with self._lock:
+            last = await get_instance(self._hass).async_add_executor_job(
+                get_last_statistics, self._hass, 1, self.statistic_id, True, {"state", "sum"}
+            )
+            end = dt_util.utcnow().replace(minute=0, second=0, microsecond=0)
+            if rows := last.get(self.statistic_id):
+                start = dt_util.utc_from_timestamp(rows[0]["start"]) + timedelta(hours=1)
+                last_state, last_sum = rows[0]["state"], rows[0]["sum"]
+            else:
+                start = end - timedelta(days=BACKFILL_DAYS)
+                last_state, last_sum = None, 0.0
+
+            while start < end:
+                batch_end = min(end, start + timedelta(days=BATCH_DAYS))
+                if (points := await self._client.fetch_statistics(start, batch_end)) is None:
+                    if STATISTICS in self._client.unsupported:
+                        self.async_stop()
+                    return
+
+                statistics = []
+                for hour, value in points:
+                    if not start <= hour < batch_end or hour.minute or hour.second:
+                        continue
+                    last_sum += consumption_delta(last_state, value)
+                    last_state = value
+                    statistics.append(StatisticData(start=hour, state=value, sum=last_sum))
+
+                if statistics:
+                    async_add_external_statistics(self._hass, self._metadata, statistics)
+                    _LOGGER.debug("Imported %s hourly statistics up to %s", len(statistics), statistics[-1]["start"])
+                start = batch_end
@@ -1,81 +1,53 @@
-"""Binary sensor for Biocat Online & Protection modes."""
-from datetime import timedelta
+"""Binary sensors for Watercryst Biocat."""
 import logging
 
-from homeassistant.components.binary_sensor import BinarySensorEntity
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.core import HomeAssistant
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from . import DOMAIN
+from .api import ENDPOINT_STATE
+from .models import FIELDS, leakage_protection_paused
 
 _LOGGER = logging.getLogger(__name__)
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    """Set up Watercryst Biocat from a config entry."""
-    _LOGGER.debug("Setting up Watercryst Biocat integration...")
-    hass.data.setdefault(DOMAIN, {})
-
-    # Lese den API-Schlüssel aus der Konfiguration
-    api_key = entry.data["api_key"]
-    _LOGGER.debug("API key loaded: %s", api_key[:4] + "****")
-
-    # Erstelle einen DataUpdateCoordinator
-    async def async_update_data():
-        """Fetch data from the API."""
-        from .sensor import fetch_data
-        _LOGGER.debug("Starting data update...")
-        data = await fetch_data(api_key)
-        if data is not None:
-            _LOGGER.debug("Data fetched successfully: %s", data)
-            return {"cumulativeWaterConsumption": data}
-        _LOGGER.warning("No data fetched from API.")
-        return {}
-
-    coordinator = DataUpdateCoordinator(
-        hass,
-        _LOGGER,
-        name="Watercryst Biocat",
-        update_method=async_update_data,
-        update_interval=timedelta(seconds=30),  # Aktualisierungsintervall auf 60 Sekunden setzen
-    )
-
-    # Erste Aktualisierung durchführen
-    _LOGGER.debug("Performing first data refresh...")
-    await coordinator.async_config_entry_first_refresh()
-
-    # Speichere den Coordinator
-    hass.data[DOMAIN][entry.entry_id] = coordinator
-    _LOGGER.debug("Coordinator stored successfully.")
-
-    # Weiterleitung an die Sensorplattform
-    _LOGGER.debug("Forwarding entry setups to sensor platform...")
-    await hass.config_entries.async_forward_entry_setups(entry, ["sensor"])
-    _LOGGER.debug("Sensor platform setup complete.")
-    return True
+# Gerätezustand aus den Coordinator-Daten (keine zusätzlichen Abfragen)
+BINARY_SENSORS = {
+    "online": {"name": "Online", "icon": "mdi:cloud-check", "device_class": BinarySensorDeviceClass.CONNECTIVITY},
+    "absenceModeEnabled": {"name": "Abwesenheitsmodus", "icon": "mdi:shield-home", "device_class": None},
+    # Kontext Endpunkt: die Pause läuft ab, ohne dass sich der Wert ändert
+    "pauseLeakageProtectionUntilUTC": {"name": "Leckageschutz pausiert", "icon": "mdi:shield-off", "device_class": None, "context": ENDPOINT_STATE},
+}
+
+# Lokale Leckerkennung (siehe anomaly.py)
+BINARY_SENSORS.update({
+    "continuousFlow": {"name": "Leckverdacht Dauerdurchfluss", "icon": "mdi:water-alert", "device_class": BinarySensorDeviceClass.PROBLEM},
+    "pressureDecay": {"name": "Leckverdacht Druckabfall", "icon": "mdi:gauge-low", "device_class": BinarySensorDeviceClass.PROBLEM},
+    "unusualConsumption": {"name": "Ungewöhnlicher Verbrauch", "icon": "mdi:water-alert-outline", "device_class": BinarySensorDeviceClass.PROBLEM},
+})
 
 async def async_setup_entry(hass, entry, async_add_entities):
-    """Set up Watercryst Biocat sensors."""
-    _LOGGER.debug("Setting up sensors for Watercryst Biocat...")
+    """Set up Watercryst Biocat binary sensors."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
-    # Erstelle Sensoren basierend auf den definierten SENSORS
-    sensors = [
-        WatercrystSensor(coordinator, sensor_type)
-        for sensor_type in SENSORS
-    ]
-    _LOGGER.debug("Sensors created: %s", [sensor._name for sensor in sensors])
-    async_add_entities(sensors)
-    _LOGGER.debug("Sensors added to Home Assistant.")
+    async_add_entities(
+        WatercrystBinarySensor(coordinator, sensor_type, entry.entry_id)
+        for sensor_type in BINARY_SENSORS
+    )
 
-class WatercrystBinarySensor(BinarySensorEntity):
+class WatercrystBinarySensor(CoordinatorEntity, BinarySensorEntity):
     """Representation of a Watercryst Biocat binary sensor."""
 
-    def __init__(self, coordinator, sensor_type, name):
+    def __init__(self, coordinator, sensor_type, entry_id):
         """Initialize the binary sensor."""
-        self._coordinator = coordinator
+        # Nur benachrichtigen, wenn sich der eigene Wert geändert hat
+        super().__init__(coordinator, context=BINARY_SENSORS[sensor_type].get("context", sensor_type))
         self._sensor_type = sensor_type
-        self._name = name
+        self._field = FIELDS[sensor_type]
+        self._name = BINARY_SENSORS[sensor_type]["name"]
+        self._icon = BINARY_SENSORS[sensor_type]["icon"]
+        self._device_class = BINARY_SENSORS[sensor_type]["device_class"]
+        self._entry_id = entry_id
 
     @property
     def name(self):
@@ -85,10 +57,39 @@ class WatercrystBinarySensor(BinarySensorEntity):
     @property
     def is_on(self):
         """Return true if the binary sensor is on."""
-        return self._coordinator.data.get(self._sensor_type, False)
+        value = getattr(self.coordinator.data, self._field)
+        if self._sensor_type == "pauseLeakageProtectionUntilUTC":
+            return leakage_protection_paused(value)
+        return None if value is None else bool(value)
+
+    @property
+    def icon(self):
+        """Return the icon for the sensor."""
+        return self._icon
+
+    @property
+    def device_class(self):
+        """Return the device class of the sensor."""
+        return self._device_class
 
     @property
     def available(self):
         """Return if entity is available."""
-        return self._coordinator.last_update_success
+        return self.coordinator.last_update_success
 
+    @property
+    def unique_id(self):
+        """Return a unique ID for the sensor."""
+        return f"{self._entry_id}_{self._sensor_type}"
+
+    @property
+    def device_info(self):
+        """Return device information for the sensor."""
+        return {
+            "identifiers": {(DOMAIN, self._entry_id)},
+            "name": "Watercryst Biocat",
+            "manufacturer": "Watercryst",
+            "model": "Biocat",
+            "sw_version": "1.5.8",
+            "entry_type": DeviceEntryType.SERVICE,
+        }
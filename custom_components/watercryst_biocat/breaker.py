@@ -0,0 +1,63 @@
+"""Circuit breaker for the Watercryst Biocat API endpoints."""
+import random
+
+# Nach so vielen Fehlschlägen in Folge wird der Endpunkt nicht mehr abgefragt
+BREAKER_FAILURE_THRESHOLD = 3
+
+# Wartezeit (Sekunden) bis zur nächsten Probeabfrage, verdoppelt bei jedem erneuten Fehlschlag
+BREAKER_BACKOFF_BASE = 30
+BREAKER_BACKOFF_MAX = 900
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Circuit breaker of one endpoint.
+
+    The breaker opens after BREAKER_FAILURE_THRESHOLD failures in a row.
+    While it is open the endpoint is not requested. Once the back-off has
+    passed, a single probe request is allowed (half open): success closes
+    the breaker, failure opens it again with twice the back-off.
+    """
+
+    __slots__ = ("state", "failures", "trips", "retry_at")
+
+    def __init__(self):
+        """Initialize a closed breaker."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.retry_at = 0.0
+
+    def allow(self, now):
+        """Return whether the endpoint may be requested."""
+        if self.state == STATE_OPEN and now >= self.retry_at:
+            self.state = STATE_HALF_OPEN
+        return self.state != STATE_OPEN
+
+    def record_success(self):
+        """Close the breaker after a successful request."""
+        self.state = STATE_CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def record_failure(self, now):
+        """Count a failed request and open the breaker if needed."""
+        self.failures += 1
+        if self.state == STATE_HALF_OPEN or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            backoff = min(BREAKER_BACKOFF_MAX, BREAKER_BACKOFF_BASE * 2 ** self.trips)
+            # Etwas Streuung, damit Proben mehrerer Einträge nicht zusammenfallen
+            self.retry_at = now + backoff * random.uniform(0.9, 1.1)
+            self.trips += 1
+            self.state = STATE_OPEN
+
+    def as_dict(self, now):
+        """Return the breaker state."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "trips": self.trips,
+            "retry_in": max(0.0, round(self.retry_at - now, 1)) if self.state == STATE_OPEN else None,
+        }
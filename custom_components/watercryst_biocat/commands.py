@@ -0,0 +1,134 @@
+"""Command queue for Watercryst Biocat."""
+import asyncio
+from collections import deque
+import logging
+import random
+import time
+
+from .api import WatercrystApiError, WatercrystCommandRejected, WatercrystRateLimitError
+
+_LOGGER = logging.getLogger(__name__)
+
+COMMAND_MAX_ATTEMPTS = 4
+COMMAND_BACKOFF_BASE = 1.0
+COMMAND_BACKOFF_MAX = 60.0
+
+# Mindestabstand (Sekunden) zwischen zwei Befehlen
+COMMAND_MIN_SPACING = 0.5
+
+# Gegensätzliche Befehle: ein noch wartender wird durch den anderen ersetzt
+OPPOSITE_COMMANDS = {
+    "/watersupply/open": "/watersupply/close",
+    "/watersupply/close": "/watersupply/open",
+    "/absence/enable": "/absence/disable",
+    "/absence/disable": "/absence/enable",
+    "/leakageprotection/pause": "/leakageprotection/unpause",
+    "/leakageprotection/unpause": "/leakageprotection/pause",
+}
+
+
+def opposite_command(url):
+    """Return the URL of the command undoing the given one, or None."""
+    for path, opposite in OPPOSITE_COMMANDS.items():
+        if url.endswith(path):
+            return f"{url[: -len(path)]}{opposite}"
+    return None
+
+
+class WatercrystCommandQueue:
+    """Serialized command queue of one config entry.
+
+    Commands (water supply, self test, micro-leakage measurement, event
+    acknowledgement, ...) are sent one after another in the order they were
+    queued. A command that is the last one queued is not queued again; the
+    caller waits for it instead. A queued command that has not been sent
+    yet is dropped (and reports failure) when its opposite is queued, e.g.
+    close after open, so the last request always wins. Failed commands are
+    retried with jittered exponential back-off, and HTTP 429 pauses the
+    queue for the server's Retry-After delay.
+    """
+
+    def __init__(self, client):
+        """Initialize the queue."""
+        self._client = client
+        self._queue = deque()
+        self._current = None
+        self._worker = None
+        self._not_before = 0.0
+
+    async def async_send(self, url):
+        """Queue a command and wait until it was sent. Return True on success."""
+        last = self._queue[-1] if self._queue else self._current
+        if last is not None and last[0] == url:
+            _LOGGER.debug("Command %s already pending, waiting for it", url)
+            future = last[1]
+        else:
+            if (opposite := opposite_command(url)) is not None:
+                self._drop(opposite)
+            future = asyncio.get_running_loop().create_future()
+            self._queue.append((url, future))
+            if self._worker is None or self._worker.done():
+                self._worker = asyncio.get_running_loop().create_task(self._run())
+        return await asyncio.shield(future)
+
+    def _drop(self, url):
+        """Drop the queued, not yet sent commands to a URL."""
+        for command in [command for command in self._queue if command[0] == url]:
+            _LOGGER.debug("Dropping pending command %s", url)
+            self._queue.remove(command)
+            command[1].set_result(False)
+
+    async def async_shutdown(self):
+        """Stop the worker and fail all pending commands."""
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+        if self._current is not None:
+            self._queue.appendleft(self._current)
+            self._current = None
+        while self._queue:
+            _, future = self._queue.popleft()
+            if not future.done():
+                future.set_result(False)
+
+    async def _run(self):
+        """Send the queued commands one after another."""
+        while self._queue:
+            url, future = self._current = self._queue.popleft()
+            try:
+                result = await self._send_with_retry(url)
+            finally:
+                self._current = None
+            if not future.done():
+                future.set_result(result)
+
+    async def _send_with_retry(self, url):
+        """Send a command, retrying transient errors."""
+        for attempt in range(COMMAND_MAX_ATTEMPTS):
+            if (wait := self._not_before - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self._client.post_command(url)
+            except WatercrystRateLimitError as e:
+                delay = e.retry_after if e.retry_after is not None else self._backoff(attempt)
+                _LOGGER.warning("Rate limited by API, pausing commands for %.1f s", delay)
+                self._not_before = time.monotonic() + delay
+                continue
+            except WatercrystCommandRejected as e:
+                _LOGGER.error("Command rejected by API: %s", e)
+                return False
+            except WatercrystApiError as e:
+                delay = self._backoff(attempt)
+                _LOGGER.warning("%s (attempt %s/%s)", e, attempt + 1, COMMAND_MAX_ATTEMPTS)
+                self._not_before = time.monotonic() + delay
+                continue
+            self._not_before = time.monotonic() + COMMAND_MIN_SPACING
+            return True
+
+        _LOGGER.error("Failed to send command to %s after %s attempts", url, COMMAND_MAX_ATTEMPTS)
+        return False
+
+    @staticmethod
+    def _backoff(attempt):
+        """Return a jittered exponential back-off delay in seconds."""
+        return random.uniform(0, min(COMMAND_BACKOFF_MAX, COMMAND_BACKOFF_BASE * 2 ** attempt))
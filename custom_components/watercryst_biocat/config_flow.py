@@ -1,8 +1,34 @@
 """Config flow for Watercryst Biocat integration."""
 from homeassistant import config_entries
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import callback
+from homeassistant.helpers.network import NoURLAvailableError
 import voluptuous as vol
 
 from . import DOMAIN
+from .const import (
+    CONF_INTERVAL_CUMULATIVE,
+    CONF_INTERVAL_EVENTS,
+    CONF_INTERVAL_MEASUREMENTS_MAX,
+    CONF_INTERVAL_MEASUREMENTS_MIN,
+    CONF_INTERVAL_STATE,
+    CONF_THRESHOLD_FLOW_RATE,
+    CONF_THRESHOLD_PRESSURE,
+    CONF_THRESHOLD_TEMPERATURE,
+    DEFAULT_INTERVAL_CUMULATIVE,
+    DEFAULT_INTERVAL_EVENTS,
+    DEFAULT_INTERVAL_MEASUREMENTS_MAX,
+    DEFAULT_INTERVAL_MEASUREMENTS_MIN,
+    DEFAULT_INTERVAL_STATE,
+    DEFAULT_THRESHOLD_FLOW_RATE,
+    DEFAULT_THRESHOLD_PRESSURE,
+    DEFAULT_THRESHOLD_TEMPERATURE,
+    MIN_INTERVAL,
+)
+
+INTERVAL_SCHEMA = vol.All(vol.Coerce(int), vol.Range(min=MIN_INTERVAL, max=3600))
+THRESHOLD_SCHEMA = vol.All(vol.Coerce(float), vol.Range(min=0))
 
 class WatercrystConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Watercryst Biocat."""
@@ -16,3 +42,62 @@ class WatercrystConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required("api_key"): str
         }))
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Return the options flow."""
+        return WatercrystOptionsFlow(config_entry)
+
+class WatercrystOptionsFlow(config_entries.OptionsFlow):
+    """Handle the options for Watercryst Biocat."""
+
+    def __init__(self, config_entry):
+        """Initialize the options flow."""
+        self._entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        # Webhook-URL für Push-Updates anzeigen
+        try:
+            webhook_url = webhook.async_generate_url(self.hass, self._entry.data[CONF_WEBHOOK_ID])
+        except (KeyError, NoURLAvailableError):
+            webhook_url = "-"
+
+        return self.async_show_form(step_id="init", description_placeholders={"webhook_url": webhook_url}, data_schema=vol.Schema({
+            vol.Optional(
+                CONF_INTERVAL_MEASUREMENTS_MIN,
+                default=options.get(CONF_INTERVAL_MEASUREMENTS_MIN, DEFAULT_INTERVAL_MEASUREMENTS_MIN),
+            ): INTERVAL_SCHEMA,
+            vol.Optional(
+                CONF_INTERVAL_MEASUREMENTS_MAX,
+                default=options.get(CONF_INTERVAL_MEASUREMENTS_MAX, DEFAULT_INTERVAL_MEASUREMENTS_MAX),
+            ): INTERVAL_SCHEMA,
+            vol.Optional(
+                CONF_INTERVAL_STATE,
+                default=options.get(CONF_INTERVAL_STATE, DEFAULT_INTERVAL_STATE),
+            ): INTERVAL_SCHEMA,
+            vol.Optional(
+                CONF_INTERVAL_CUMULATIVE,
+                default=options.get(CONF_INTERVAL_CUMULATIVE, DEFAULT_INTERVAL_CUMULATIVE),
+            ): INTERVAL_SCHEMA,
+            vol.Optional(
+                CONF_INTERVAL_EVENTS,
+                default=options.get(CONF_INTERVAL_EVENTS, DEFAULT_INTERVAL_EVENTS),
+            ): INTERVAL_SCHEMA,
+            vol.Optional(
+                CONF_THRESHOLD_PRESSURE,
+                default=options.get(CONF_THRESHOLD_PRESSURE, DEFAULT_THRESHOLD_PRESSURE),
+            ): THRESHOLD_SCHEMA,
+            vol.Optional(
+                CONF_THRESHOLD_TEMPERATURE,
+                default=options.get(CONF_THRESHOLD_TEMPERATURE, DEFAULT_THRESHOLD_TEMPERATURE),
+            ): THRESHOLD_SCHEMA,
+            vol.Optional(
+                CONF_THRESHOLD_FLOW_RATE,
+                default=options.get(CONF_THRESHOLD_FLOW_RATE, DEFAULT_THRESHOLD_FLOW_RATE),
+            ): THRESHOLD_SCHEMA,
+        }))
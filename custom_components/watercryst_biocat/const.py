@@ -0,0 +1,57 @@
+"""Constants for the Watercryst Biocat integration."""
+from .api import ENDPOINT_CUMULATIVE, ENDPOINT_EVENTS, ENDPOINT_STATE
+
+DOMAIN = "watercryst_biocat"
+
+# Abfrageintervalle (Sekunden) pro Endpunkt
+CONF_INTERVAL_CUMULATIVE = "interval_cumulative"
+CONF_INTERVAL_STATE = "interval_state"
+CONF_INTERVAL_EVENTS = "interval_events"
+# Messwerte: adaptives Intervall zwischen Unter- und Obergrenze
+CONF_INTERVAL_MEASUREMENTS_MIN = "interval_measurements_min"
+CONF_INTERVAL_MEASUREMENTS_MAX = "interval_measurements_max"
+
+DEFAULT_INTERVAL_CUMULATIVE = 300
+DEFAULT_INTERVAL_STATE = 30
+DEFAULT_INTERVAL_EVENTS = 60
+DEFAULT_INTERVAL_MEASUREMENTS_MIN = 5
+DEFAULT_INTERVAL_MEASUREMENTS_MAX = 120
+
+MIN_INTERVAL = 5
+
+# Faktor, um den das Messwert-Intervall pro Abfrage ohne Aktivität wächst
+INTERVAL_BACKOFF_FACTOR = 2.0
+
+# Zustände von mlState, während derer eine Mikroleckage-Messung läuft
+ML_STATES_ACTIVE = ("measuring", "running")
+
+INTERVAL_OPTIONS = {
+    ENDPOINT_CUMULATIVE: (CONF_INTERVAL_CUMULATIVE, DEFAULT_INTERVAL_CUMULATIVE),
+    ENDPOINT_STATE: (CONF_INTERVAL_STATE, DEFAULT_INTERVAL_STATE),
+    ENDPOINT_EVENTS: (CONF_INTERVAL_EVENTS, DEFAULT_INTERVAL_EVENTS),
+}
+
+# Mindeständerung, ab der ein Sensor seinen Zustand neu schreibt
+CONF_THRESHOLD_PRESSURE = "threshold_pressure"
+CONF_THRESHOLD_TEMPERATURE = "threshold_temperature"
+CONF_THRESHOLD_FLOW_RATE = "threshold_flow_rate"
+
+DEFAULT_THRESHOLD_PRESSURE = 0.01
+DEFAULT_THRESHOLD_TEMPERATURE = 0.1
+DEFAULT_THRESHOLD_FLOW_RATE = 0.1
+
+THRESHOLD_OPTIONS = {
+    "pressure": (CONF_THRESHOLD_PRESSURE, DEFAULT_THRESHOLD_PRESSURE),
+    "waterTemp": (CONF_THRESHOLD_TEMPERATURE, DEFAULT_THRESHOLD_TEMPERATURE),
+    "flowRate": (CONF_THRESHOLD_FLOW_RATE, DEFAULT_THRESHOLD_FLOW_RATE),
+}
+
+# Gemeinsame Planung aller Konfigurationseinträge
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+MAX_CONCURRENT_POLLS = 8
+
+# Push-Empfang per Webhook: Abfrageintervall (s) zum Abgleich, solange Push-Daten eintreffen
+PUSH_RECONCILE_INTERVAL = 300
+
+# Ereignis auf dem Home-Assistant-Bus für jeden neuen Alarm des Geräts
+EVENT_ALARM = f"{DOMAIN}_alarm"
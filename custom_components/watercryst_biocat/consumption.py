@@ -0,0 +1,103 @@
+"""Persistent consumption accumulator for Watercryst Biocat."""
+from homeassistant.core import callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .rollups import (
+    PERIOD_DAY,
+    PERIOD_HOUR,
+    PERIOD_MONTH,
+    PERIOD_WEEK,
+    ConsumptionRollups,
+    consumption_delta,
+)
+
+STORAGE_VERSION = 1
+
+# Verzögerung für das Speichern, damit nicht bei jeder Abfrage geschrieben wird
+SAVE_DELAY = 300
+
+
+def consumption_store(hass, entry_id):
+    """Return the store holding the consumption of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.consumption.{entry_id}")
+
+
+class WatercrystConsumption:
+    """Hourly, daily, weekly and monthly consumption of one config entry.
+
+    The deltas of the cumulative counter are added to ConsumptionRollups,
+    which keep the totals of the recent local calendar periods (hours,
+    days, weeks starting on Monday and months). The baseline and the
+    rollups are persisted with a delayed save, so a restart continues
+    from the previous values without writing to disk on every poll.
+    """
+
+    def __init__(self, hass, entry_id):
+        """Initialize the accumulator."""
+        self._store = consumption_store(hass, entry_id)
+        self.last_cumulative = None
+        self.updated = None
+        self.rollups = ConsumptionRollups()
+
+    async def async_load(self):
+        """Restore the baseline and rollups from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self.last_cumulative = data.get("last_cumulative")
+        self.rollups.load(data.get("rollups", {}))
+        if data.get("updated"):
+            self.updated = dt_util.as_local(dt_util.parse_datetime(data["updated"]))
+
+    async def async_save(self):
+        """Write the current values to storage immediately."""
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self):
+        """Return the data to persist."""
+        return {
+            "last_cumulative": self.last_cumulative,
+            "updated": self.updated.isoformat() if self.updated else None,
+            "rollups": self.rollups.as_dict(),
+        }
+
+    def _current(self, period):
+        """Return the total of the period of the last update."""
+        return self.rollups.current(period, self.updated or dt_util.now())
+
+    def previous_periods(self, period, count=None):
+        """Return the totals of the periods before the current one, newest first."""
+        return self.rollups.as_dicts(period, count, before=self.updated or dt_util.now())
+
+    @property
+    def hourly(self):
+        """Return the consumption of the current hour."""
+        return self._current(PERIOD_HOUR)
+
+    @property
+    def daily(self):
+        """Return the consumption of the current day."""
+        return self._current(PERIOD_DAY)
+
+    @property
+    def weekly(self):
+        """Return the consumption of the current week."""
+        return self._current(PERIOD_WEEK)
+
+    @property
+    def monthly(self):
+        """Return the consumption of the current month."""
+        return self._current(PERIOD_MONTH)
+
+    @callback
+    def update(self, cumulative, now=None):
+        """Add the delta of a new cumulative value."""
+        self.updated = dt_util.as_local(now or dt_util.now())
+
+        # Auch ohne Verbrauch, damit eine neue Periode bei 0 beginnt
+        self.rollups.add(consumption_delta(self.last_cumulative, cumulative), self.updated)
+
+        self.last_cumulative = cumulative
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
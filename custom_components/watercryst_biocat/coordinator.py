@@ -0,0 +1,516 @@
+"""Data update coordinator for Watercryst Biocat."""
+import logging
+import time
+from datetime import timedelta
+
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .api import ENDPOINT_CUMULATIVE, ENDPOINT_EVENTS, ENDPOINT_MEASUREMENTS, ENDPOINT_STATE, ENDPOINTS
+from .const import (
+    CONF_INTERVAL_MEASUREMENTS_MAX,
+    CONF_INTERVAL_MEASUREMENTS_MIN,
+    DEFAULT_INTERVAL_MEASUREMENTS_MAX,
+    DEFAULT_INTERVAL_MEASUREMENTS_MIN,
+    DOMAIN,
+    EVENT_ALARM,
+    INTERVAL_BACKOFF_FACTOR,
+    INTERVAL_OPTIONS,
+    MIN_INTERVAL,
+    ML_STATES_ACTIVE,
+    PUSH_RECONCILE_INTERVAL,
+)
+from .anomaly import WatercrystLeakDetector
+from .breaker import STATE_OPEN, CircuitBreaker
+from .commands import WatercrystCommandQueue
+from .consumption import WatercrystConsumption
+from .events import WatercrystEventLog
+from .history import WatercrystHistory
+from .interval import AdaptiveInterval
+from .metrics import CycleMetrics
+from .models import FIELDS, WatercrystData
+from .recording import ResponseRecorder, write_records
+
+_LOGGER = logging.getLogger(__name__)
+
+# Wartezeit (Sekunden) nach einem Befehl, bevor der Zustand neu abgefragt wird
+STATE_REFRESH_DELAY = 2
+
+# Letzter bekannter Zustand für den Start ohne Warten auf die API
+SNAPSHOT_STORAGE_VERSION = 1
+SNAPSHOT_SAVE_DELAY = 60
+
+# Aufzeichnung der API-Antworten (unterhalb des Konfigurationsverzeichnisses) und Schreibintervall
+RECORDING_DIRECTORY = f"{DOMAIN}_recordings"
+RECORDING_FLUSH_INTERVAL = 60
+
+# Endpunkte, deren Fälligkeit weniger als diese Zeit entfernt ist, werden mit abgefragt
+SCHEDULE_TOLERANCE = 1
+
+
+def snapshot_store(hass, entry_id):
+    """Return the store holding the last known data of a config entry."""
+    return Store(hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.snapshot.{entry_id}")
+
+
+class WatercrystCoordinator(DataUpdateCoordinator):
+    """Coordinator polling each API endpoint on its own interval.
+
+    The cumulative statistic, the device state and the measurements are
+    polling tiers with independent intervals. Every cycle only fetches the
+    endpoints that are due and merges them into a copy of the previous
+    WatercrystData. Entities register with their field key as listener
+    context and are only notified when that value actually changed.
+
+    The measurements interval is adaptive: it drops to its floor while water
+    is flowing or a micro-leakage measurement runs and backs off
+    exponentially towards its ceiling while the device is idle.
+
+    Endpoints the API reports as not modified (HTTP 304) come back as the
+    very result object merged before; they are not merged again, so
+    unchanged data costs neither parsing nor entity updates.
+
+    Every measurements poll is also recorded in the tap event history and
+    run through the local leak detector, whose results are part of the data.
+
+    Device events are fetched incrementally into a bounded event log. Every
+    new, unacknowledged alarm is fired as EVENT_ALARM on the event bus,
+    except for those already present on the very first fetch. Events are
+    acknowledged by id through the command queue.
+
+    Updates pushed to the webhook are merged the same way. A poll running
+    meanwhile keeps them and does not override endpoints pushed after it
+    started. While pushes for an endpoint keep arriving, polling it is only
+    a slow reconciliation; if they stop, the regular interval applies again
+    after at most PUSH_RECONCILE_INTERVAL seconds.
+
+    Polls go through the domain-wide scheduler, which caps how many entries
+    fetch at the same time; the first scheduled poll is shifted by the
+    entry's phase so that entries set up together spread over the interval.
+
+    Endpoints the API client found unsupported (HTTP 404 on an assumed
+    endpoint, see OPTIONAL_ENDPOINTS) are no longer polled.
+
+    Each endpoint has a circuit breaker. A failing endpoint keeps its last
+    good values, which are stale until the next successful request; while
+    its breaker is open the endpoint is only probed with back-off.
+
+    Raw API responses can be recorded to RECORDING_DIRECTORY for offline
+    replay (scripts/replay.py); they are written every
+    RECORDING_FLUSH_INTERVAL seconds in the executor by the entry that
+    started the recording.
+
+    The last known data is saved with a delay. On the next start it is
+    restored (as stale values) so the config entry can be set up without
+    waiting for the first refresh.
+    """
+
+    def __init__(self, hass, entry, client, scheduler):
+        """Initialize the coordinator."""
+        self.client = client
+        self._scheduler = scheduler
+        self._phase = scheduler.async_register_entry(entry.entry_id)
+        self._entry_id = entry.entry_id
+        self.commands = WatercrystCommandQueue(client)
+        self.consumption = WatercrystConsumption(hass, entry.entry_id)
+        self.history = WatercrystHistory()
+        self.leak_detector = WatercrystLeakDetector()
+        self.events = WatercrystEventLog()
+        self.cycle_metrics = CycleMetrics()
+        self.startup = {}
+        self._snapshot_store = snapshot_store(hass, entry.entry_id)
+        self._intervals = {
+            endpoint: entry.options.get(option, default)
+            for endpoint, (option, default) in INTERVAL_OPTIONS.items()
+        }
+        self.measurements_interval = AdaptiveInterval(
+            entry.options.get(CONF_INTERVAL_MEASUREMENTS_MIN, DEFAULT_INTERVAL_MEASUREMENTS_MIN),
+            entry.options.get(CONF_INTERVAL_MEASUREMENTS_MAX, DEFAULT_INTERVAL_MEASUREMENTS_MAX),
+            INTERVAL_BACKOFF_FACTOR,
+        )
+        self._last_ml_state = None
+        self._next_due = dict.fromkeys(ENDPOINTS, 0.0)
+        self._pushed_at = dict.fromkeys(ENDPOINTS, -PUSH_RECONCILE_INTERVAL)
+        self.breakers = {endpoint: CircuitBreaker() for endpoint in ENDPOINTS}
+        self._updated_at = {}
+        self._last_results = {}
+        self._recording_flush = None
+        self.state_confirmation = False
+        self.stale_endpoints = set()
+        self.staleness_changed = False
+        self.changed_fields = set(FIELDS)
+        self.refreshed_endpoints = set(ENDPOINTS)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name="Watercryst Biocat",
+            update_interval=timedelta(seconds=self.measurements_interval.floor),
+        )
+        self._state_refresh = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=STATE_REFRESH_DELAY,
+            immediate=False,
+            function=self._async_refresh_state,
+        )
+
+    def _endpoint_interval(self, endpoint):
+        """Return the current polling interval of an endpoint in seconds."""
+        if endpoint == ENDPOINT_MEASUREMENTS:
+            interval = self.measurements_interval.current
+        else:
+            interval = self._intervals[endpoint]
+        # Solange Push-Daten eintreffen, nur noch zum Abgleich abfragen
+        if time.monotonic() - self._pushed_at[endpoint] < PUSH_RECONCILE_INTERVAL:
+            return max(interval, PUSH_RECONCILE_INTERVAL)
+        return interval
+
+    def _update_measurements_interval(self, data):
+        """Adapt the measurements interval to the current device activity."""
+        ml_state = data.ml_state
+        active = (
+            bool(data.flow_rate)
+            or ml_state in ML_STATES_ACTIVE
+            or (self._last_ml_state is not None and ml_state != self._last_ml_state)
+        )
+        self._last_ml_state = ml_state
+        data.measurements_poll_interval = self.measurements_interval.update(active)
+
+    async def async_restore(self):
+        """Restore the last known data; return whether there was any.
+
+        The restored values are stale until their endpoint was fetched.
+        """
+        if (stored := await self._snapshot_store.async_load()) is None:
+            return False
+        self.data = WatercrystData.from_dict(stored["data"])
+        self.events.load(stored.get("events", []))
+        # Ältere Stände enthalten kein Flag: Ereignisse wurden dann nie abgerufen
+        self.events.synced = stored.get("events_synced", False)
+        for endpoint in ENDPOINTS:
+            self._updated_at[endpoint] = stored["saved_at"]
+        self.stale_endpoints = set(ENDPOINTS)
+        return True
+
+    async def async_first_refresh(self):
+        """Run the first refresh and record how long it took.
+
+        Without restored data this is the config entry's first refresh,
+        which raises ConfigEntryNotReady if it fails.
+        """
+        start = time.perf_counter()
+        try:
+            if self.data is None:
+                await self.async_config_entry_first_refresh()
+            else:
+                await self.async_refresh()
+        finally:
+            self.startup["first_refresh_ms"] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def async_save_snapshot(self):
+        """Write the last known data to storage immediately."""
+        if self.data is not None:
+            await self._snapshot_store.async_save(self._snapshot_data())
+
+    @callback
+    def _snapshot_data(self):
+        """Return the last known data to persist."""
+        return {
+            "saved_at": time.time(),
+            "data": self.data.as_dict(),
+            "events": self.events.as_list(),
+            "events_synced": self.events.synced,
+        }
+
+    @callback
+    def async_request_endpoint_refresh(self, endpoint):
+        """Mark an endpoint as due so the next refresh fetches it."""
+        self._next_due[endpoint] = 0.0
+
+    async def async_request_refresh(self):
+        """Request a debounced refresh of all endpoints.
+
+        Used by homeassistant.update_entity; the client's cache absorbs
+        bursts of these requests.
+        """
+        for endpoint in ENDPOINTS:
+            self.async_request_endpoint_refresh(endpoint)
+        await super().async_request_refresh()
+
+    async def async_acknowledge_event(self, event_id=None):
+        """Acknowledge an event, or the current one without an id. Return True on success."""
+        if not await self.commands.async_send(self.client.ack_event_url(event_id)):
+            return False
+        if event_id is not None:
+            self.events.mark_acknowledged(event_id)
+        # Offene Alarme sofort aktualisieren
+        self.async_request_endpoint_refresh(ENDPOINT_EVENTS)
+        await self.async_refresh()
+        return True
+
+    @callback
+    def _fire_alarm(self, event):
+        """Fire a new alarm on the event bus."""
+        _LOGGER.warning("Alarm from Watercryst Biocat: %s", event.title or event.category)
+        self.hass.bus.async_fire(EVENT_ALARM, {"config_entry_id": self._entry_id, **event.as_dict()})
+
+    async def async_request_state_refresh(self):
+        """Request a debounced refresh of the state endpoint only.
+
+        Used after commands: several commands in a row lead to a single
+        /state request to confirm the optimistic entity states.
+        """
+        await self._state_refresh.async_call()
+
+    async def _async_refresh_state(self):
+        """Refresh the state endpoint.
+
+        state_confirmation is set while this refresh notifies the listeners.
+        """
+        self.async_request_endpoint_refresh(ENDPOINT_STATE)
+        self.state_confirmation = True
+        try:
+            await self.async_refresh()
+        finally:
+            self.state_confirmation = False
+
+    async def async_set_recording(self, enabled):
+        """Start or stop recording the raw API responses.
+
+        The recorder belongs to the API client, which entries with the same
+        API key share, so it records the polls of all of them. The entry
+        that started it owns it: only that entry flushes and stops it.
+        """
+        recorder = self.client.recorder
+        if enabled and recorder is None:
+            directory = self.hass.config.path(RECORDING_DIRECTORY, self._entry_id)
+            self.client.recorder = ResponseRecorder(directory)
+            self._recording_flush = async_track_time_interval(
+                self.hass, self._async_flush_recording, timedelta(seconds=RECORDING_FLUSH_INTERVAL)
+            )
+            _LOGGER.info("Recording API responses to %s", directory)
+        elif recorder is not None and self._recording_flush is None:
+            # Gehört einem anderen Eintrag mit demselben API-Schlüssel
+            _LOGGER.warning("Recording to %s belongs to another entry with the same API key", recorder.directory)
+        elif not enabled and recorder is not None:
+            self._recording_flush()
+            self._recording_flush = None
+            await self._async_flush_recording()
+            _LOGGER.info("Recorded %s API responses", recorder.records)
+            self.client.recorder = None
+
+    async def _async_flush_recording(self, now=None):
+        """Append the recorded responses to their files."""
+        if (recorder := self.client.recorder) is not None and (chunks := recorder.take()):
+            await self.hass.async_add_executor_job(write_records, recorder.directory, chunks)
+
+    async def async_shutdown(self):
+        """Cancel pending commands and refreshes and shut down the coordinator."""
+        if self._recording_flush is not None:
+            await self.async_set_recording(False)
+        self._state_refresh.async_shutdown()
+        await self.commands.async_shutdown()
+        self._scheduler.async_unregister_entry(self._entry_id)
+        await super().async_shutdown()
+
+    @callback
+    def async_update_listeners(self):
+        """Notify only the listeners whose value changed in the last cycle.
+
+        Listeners with an endpoint as context are notified whenever that
+        endpoint was refreshed, whether a value changed or not. All
+        listeners are notified when an endpoint failed or recovered, so
+        entities can show since when their values are stale.
+        """
+        start = time.perf_counter()
+        changed = self.changed_fields
+        refreshed = self.refreshed_endpoints
+        for update_callback, context in list(self._listeners.values()):
+            if (
+                context is None
+                or context in changed
+                or context in refreshed
+                or self.staleness_changed
+                or not self.last_update_success
+            ):
+                update_callback()
+        self.cycle_metrics.record_notify((time.perf_counter() - start) * 1000)
+
+    async def _async_update_data(self):
+        """Fetch the endpoints that are due."""
+        now = time.monotonic()
+        unsupported = self.client.unsupported
+        due = tuple(
+            endpoint for endpoint in ENDPOINTS
+            if endpoint not in unsupported
+            and self._next_due[endpoint] <= now + SCHEDULE_TOLERANCE
+            and self.breakers[endpoint].allow(now)
+        )
+        timer = self.cycle_metrics.start_cycle()
+        snapshot = None
+        if due:
+            _LOGGER.debug("Starting data update for: %s", ", ".join(due))
+            # Nur Ereignisse ab dem neuesten bekannten abfragen
+            self.client.event_cursor = self.events.cursor
+            async with self._scheduler.semaphore:
+                timer.mark("scheduler_wait_ms")
+                snapshot = await self.client.fetch_snapshot(due)
+            timer.mark("fetch_ms")
+
+        # Erst nach dem Abruf kopieren, damit währenddessen gepushte Daten erhalten bleiben
+        previous = self.data
+        data = previous.copy() if previous is not None else WatercrystData()
+        self.refreshed_endpoints = set()
+        self.staleness_changed = False
+        unchanged = set()
+        if snapshot is not None:
+            # Von der API nicht angebotene Endpunkte zählen nicht als Fehler
+            results = {endpoint: result for endpoint, result in snapshot.results.items() if endpoint not in unsupported}
+            failed = [endpoint for endpoint in snapshot.failed if endpoint not in unsupported]
+            self._update_breakers(results, now)
+            if failed and len(failed) == len(results):
+                if previous is None:
+                    timer.finish(due)
+                    self.changed_fields = set(FIELDS)
+                    raise UpdateFailed("Failed to fetch data from all APIs")
+                _LOGGER.warning("Failed to fetch data from all APIs, keeping previous values")
+            elif failed:
+                _LOGGER.warning("Failed to fetch data from: %s, keeping previous values", ", ".join(failed))
+
+            # Mit der letzten Abfrage vergleichen, nicht mit Push-Daten, die neuer sein können
+            unchanged = {
+                endpoint for endpoint, result in results.items()
+                if result is not None and result is self._last_results.get(endpoint)
+            }
+            self._last_results.update(
+                (endpoint, result) for endpoint, result in results.items() if result is not None
+            )
+            # Während des Abrufs gepushte Werte sind neuer als die abgefragten
+            pushed = {endpoint for endpoint in results if self._pushed_at[endpoint] >= now}
+            polled = {endpoint: result for endpoint, result in results.items() if endpoint not in pushed}
+            self.refreshed_endpoints = self._merge_results(data, polled, unchanged)
+            timer.mark("merge_ms")
+
+        data.update_duration = round(timer.finish(due), 1)
+        data.api_errors = self.client.metrics.errors
+
+        # Nach einem Fehler alle Entitäten benachrichtigen (Verfügbarkeit)
+        if self.last_update_success:
+            self.changed_fields = data.changed_fields(previous)
+        else:
+            self.changed_fields = set(FIELDS)
+
+        # Nächste Fälligkeit je Endpunkt bestimmen
+        for endpoint in due:
+            self._next_due[endpoint] = now + self._endpoint_interval(endpoint) * (1 + self._phase)
+        if due:
+            # Versatz nur auf die erste geplante Abfrage anwenden
+            self._phase = 0.0
+        # Bei offenem Schutzschalter erst zur nächsten Probeabfrage
+        for endpoint, breaker in self.breakers.items():
+            if breaker.state == STATE_OPEN:
+                self._next_due[endpoint] = max(self._next_due[endpoint], breaker.retry_at)
+        self._schedule_next_refresh()
+        if self.refreshed_endpoints - unchanged:
+            self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+        return data
+
+    def _update_breakers(self, results, now):
+        """Record the outcome of each fetched endpoint in its breaker."""
+        stale = self.stale_endpoints - self.client.unsupported
+        for endpoint, result in results.items():
+            breaker = self.breakers[endpoint]
+            if result is None:
+                breaker.record_failure(now)
+                if breaker.state == STATE_OPEN:
+                    _LOGGER.warning(
+                        "Pausing requests to %s for %.0f s after repeated failures",
+                        endpoint,
+                        breaker.retry_at - now,
+                    )
+                stale.add(endpoint)
+            else:
+                breaker.record_success()
+                self._updated_at[endpoint] = time.time()
+                stale.discard(endpoint)
+        self.staleness_changed = stale != self.stale_endpoints
+        self.stale_endpoints = stale
+
+    def data_updated(self, endpoint):
+        """Return the ISO time of the last successful update of a stale endpoint, else None."""
+        if endpoint not in self.stale_endpoints or (updated := self._updated_at.get(endpoint)) is None:
+            return None
+        return dt_util.utc_from_timestamp(updated).isoformat()
+
+    def _merge_results(self, data, results, unchanged=frozenset()):
+        """Merge endpoint results into data and return the merged endpoints.
+
+        Results of the endpoints in unchanged were merged before and are
+        skipped, except for what depends on the time passing.
+        """
+        # Fehlende Endpunkte behalten ihre letzten Werte
+        if (cumulative := results.get(ENDPOINT_CUMULATIVE)) is not None:
+            # Auch unverändert, damit eine neue Periode bei 0 beginnt
+            self.consumption.update(cumulative)
+            data.cumulative_water_consumption = cumulative
+            data.hourly_water_consumption = self.consumption.hourly
+            data.daily_water_consumption = self.consumption.daily
+            data.weekly_water_consumption = self.consumption.weekly
+            data.monthly_water_consumption = self.consumption.monthly
+        if (state := results.get(ENDPOINT_STATE)) is not None and ENDPOINT_STATE not in unchanged:
+            data.apply(state)
+        if (measurements := results.get(ENDPOINT_MEASUREMENTS)) is not None:
+            timestamp = time.time()
+            new_tap = False
+            if ENDPOINT_MEASUREMENTS not in unchanged:
+                data.apply(measurements)
+                new_tap = self.history.record(data, timestamp)
+            # Die Dauer eines Durchflusses zählt auch bei unveränderten Messwerten weiter
+            self.leak_detector.update(data, timestamp, new_tap)
+            self._update_measurements_interval(data)
+        if (events := results.get(ENDPOINT_EVENTS)) is not None:
+            if ENDPOINT_EVENTS not in unchanged:
+                # Beim allerersten Abruf nur den Verlauf übernehmen
+                synced = self.events.synced
+                for event in self.events.add(events):
+                    if synced and event.is_alarm and not event.acknowledged:
+                        self._fire_alarm(event)
+                self.events.synced = True
+            # Auch nach einer Quittierung ohne neue Ereignisse
+            data.open_alarms = len(self.events.open_alarms())
+
+        return {endpoint for endpoint, result in results.items() if result is not None}
+
+    def _schedule_next_refresh(self):
+        """Set the update interval to the time until the next endpoint is due."""
+        next_refresh = min(
+            due for endpoint, due in self._next_due.items() if endpoint not in self.client.unsupported
+        ) - time.monotonic()
+        self.update_interval = timedelta(seconds=max(MIN_INTERVAL, next_refresh))
+
+    @callback
+    def async_handle_push(self, results):
+        """Merge pushed endpoint results as if they had been polled.
+
+        A pushed endpoint is polled only every PUSH_RECONCILE_INTERVAL
+        seconds while pushes keep arriving.
+        """
+        previous = self.data
+        data = previous.copy() if previous is not None else WatercrystData()
+        self.refreshed_endpoints = self._merge_results(data, results)
+        self.changed_fields = data.changed_fields(previous) if self.last_update_success else set(FIELDS)
+
+        now = time.monotonic()
+        for endpoint in self.refreshed_endpoints:
+            self._pushed_at[endpoint] = now
+            self._updated_at[endpoint] = time.time()
+            self._next_due[endpoint] = now + self._endpoint_interval(endpoint)
+        self.staleness_changed = bool(self.stale_endpoints & self.refreshed_endpoints)
+        self.stale_endpoints -= self.refreshed_endpoints
+        self._schedule_next_refresh()
+        self.async_set_updated_data(data)
+        self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
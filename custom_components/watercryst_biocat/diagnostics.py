@@ -0,0 +1,39 @@
+"""Diagnostics support for Watercryst Biocat."""
+import time
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_WEBHOOK_ID
+
+from . import DOMAIN
+
+TO_REDACT = {"api_key", CONF_WEBHOOK_ID}
+
+async def async_get_config_entry_diagnostics(hass, entry):
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    now = time.monotonic()
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "data": coordinator.data.as_dict(),
+        "api_cache": dict(coordinator.client.cache_stats),
+        "api_requests": coordinator.client.metrics.as_dict(),
+        "circuit_breakers": {
+            endpoint: {**breaker.as_dict(now), "last_successful_update": coordinator.data_updated(endpoint)}
+            for endpoint, breaker in coordinator.breakers.items()
+        },
+        "update_cycles": coordinator.cycle_metrics.as_dict(),
+        "startup": dict(coordinator.startup),
+        "leak_detector": coordinator.leak_detector.as_dict(),
+        "recording": {
+            "directory": recorder.directory,
+            "records": recorder.records,
+        } if (recorder := coordinator.client.recorder) is not None else None,
+        "events": {
+            "cursor": coordinator.events.cursor.isoformat() if coordinator.events.cursor else None,
+            "logged": len(coordinator.events),
+            "open_alarms": len(coordinator.events.open_alarms()),
+        },
+    }
@@ -0,0 +1,85 @@
+"""Device event log for Watercryst Biocat."""
+from collections import OrderedDict
+from datetime import datetime
+
+from .models import DeviceEvent
+
+# Anzahl der gespeicherten Ereignisse pro Eintrag
+EVENT_LOG_SIZE = 200
+
+
+class WatercrystEventLog:
+    """Bounded log of the device events of one config entry.
+
+    Events are fetched incrementally: the cursor is the timestamp of the
+    newest event seen, and the API only returns events at or after it.
+    Events at the cursor itself are returned again, so events are
+    deduplicated by their id. Once full, the oldest event is dropped.
+
+    synced tells whether events were fetched before, so the device's
+    history is not mistaken for new events on the first fetch. It is
+    stored by the owner along with the events.
+    """
+
+    def __init__(self, size=EVENT_LOG_SIZE):
+        """Initialize an empty log."""
+        self.size = size
+        self._events = OrderedDict()
+        self.cursor = None
+        self.synced = False
+
+    def __len__(self):
+        """Return the number of events."""
+        return len(self._events)
+
+    def get(self, event_id):
+        """Return the event with the given id or None."""
+        return self._events.get(event_id)
+
+    def add(self, events):
+        """Add fetched events and return the ones not seen before, oldest first."""
+        new = []
+        for event in events:
+            if (known := self._events.get(event.id)) is not None:
+                # Quittierung auf dem Gerät übernehmen
+                known.acknowledged = known.acknowledged or event.acknowledged
+                continue
+            self._events[event.id] = event
+            new.append(event)
+            if self.cursor is None or event.timestamp > self.cursor:
+                self.cursor = event.timestamp
+        while len(self._events) > self.size:
+            self._events.popitem(last=False)
+        return new
+
+    def mark_acknowledged(self, event_id):
+        """Mark an event as acknowledged."""
+        if (event := self._events.get(event_id)) is not None:
+            event.acknowledged = True
+
+    def open_alarms(self):
+        """Return the unacknowledged alarms, newest first."""
+        return [event for event in reversed(self._events.values()) if event.is_alarm and not event.acknowledged]
+
+    def latest(self, count=None, alarms_only=False):
+        """Return the newest events, newest first."""
+        events = [event for event in reversed(self._events.values()) if event.is_alarm or not alarms_only]
+        return events[:count]
+
+    def as_list(self):
+        """Return all events for storage, oldest first."""
+        return [event.as_dict() for event in self._events.values()]
+
+    def load(self, items):
+        """Restore events saved by as_list."""
+        self.add(
+            DeviceEvent(
+                item["id"],
+                datetime.fromisoformat(item["timestamp"]),
+                item.get("category"),
+                item.get("title"),
+                item.get("description"),
+                item.get("acknowledged", False),
+            )
+            for item in items
+        )
@@ -0,0 +1,123 @@
+"""Tap event and flow sample history for Watercryst Biocat."""
+from array import array
+from datetime import datetime, timezone
+
+# Anzahl der gespeicherten Zapfvorgänge und Durchflusswerte pro Eintrag
+TAP_HISTORY_SIZE = 256
+FLOW_HISTORY_SIZE = 1024
+
+
+class RingBuffer:
+    """Fixed-size ring buffer of numeric records.
+
+    Every column is a preallocated array of doubles, so the buffer has a
+    constant memory footprint and appending never allocates. Once full,
+    the oldest record is overwritten.
+    """
+
+    def __init__(self, capacity, columns):
+        """Initialize an empty buffer."""
+        self.capacity = capacity
+        self.columns = columns
+        self._arrays = [array("d", bytes(8 * capacity)) for _ in columns]
+        self._start = 0
+        self._length = 0
+
+    def __len__(self):
+        """Return the number of records."""
+        return self._length
+
+    def append(self, *values):
+        """Append a record, overwriting the oldest one when full."""
+        index = (self._start + self._length) % self.capacity
+        for column, value in zip(self._arrays, values):
+            column[index] = value
+        if self._length < self.capacity:
+            self._length += 1
+        else:
+            self._start = (self._start + 1) % self.capacity
+
+    def last(self):
+        """Return the newest record or None."""
+        if not self._length:
+            return None
+        return self._record(self._length - 1)
+
+    def latest(self, count=None):
+        """Return the newest records, newest first."""
+        count = self._length if count is None else min(count, self._length)
+        return [self._record(position) for position in range(self._length - 1, self._length - 1 - count, -1)]
+
+    def _record(self, position):
+        """Return the record at a position counted from the oldest one."""
+        index = (self._start + position) % self.capacity
+        return tuple(column[index] for column in self._arrays)
+
+
+def _as_dicts(buffer, count):
+    """Return buffer records as dicts with an ISO timestamp."""
+    return [
+        {
+            "timestamp": datetime.fromtimestamp(record[0], timezone.utc).isoformat(),
+            **dict(zip(buffer.columns[1:], record[1:])),
+        }
+        for record in buffer.latest(count)
+    ]
+
+
+class WatercrystHistory:
+    """Tap events and flow samples of one config entry.
+
+    The API only reports the most recent tap, so a tap event is recorded
+    whenever the reported volume or duration differs from the last recorded
+    event; repeated polls of the same tap are not recorded again. A tap
+    identical to the last recorded one (e.g. repeated toilet flushes) is
+    recorded when water flowed since that event and has stopped. Flow
+    samples are stored as changes only: a sample is recorded when the flow
+    rate differs from the previous sample, which keeps long idle periods
+    from filling the buffer.
+    """
+
+    def __init__(self, tap_size=TAP_HISTORY_SIZE, flow_size=FLOW_HISTORY_SIZE):
+        """Initialize empty buffers."""
+        self.tap_events = RingBuffer(tap_size, ("timestamp", "volume", "duration"))
+        self.flow_samples = RingBuffer(flow_size, ("timestamp", "flow_rate"))
+        self._flow_since_tap = False
+
+    def record(self, data, timestamp):
+        """Record the tap and flow values of a measurements poll.
+
+        Return whether a new tap event was recorded.
+        """
+        new_tap = False
+        volume = data.last_water_tap_volume
+        duration = data.last_water_tap_duration
+        flow_rate = data.flow_rate
+        flowing = isinstance(flow_rate, (int, float)) and flow_rate > 0
+        if isinstance(volume, (int, float)) and isinstance(duration, (int, float)) and volume > 0:
+            last = self.tap_events.last()
+            if (
+                last is None
+                or (last[1], last[2]) != (volume, duration)
+                # Gleicher Zapfvorgang wie zuvor, aber dazwischen floss Wasser
+                or (self._flow_since_tap and not flowing)
+            ):
+                self.tap_events.append(timestamp, volume, duration)
+                self._flow_since_tap = False
+                new_tap = True
+        if flowing:
+            self._flow_since_tap = True
+
+        if isinstance(flow_rate, (int, float)):
+            last = self.flow_samples.last()
+            if last is None or (timestamp > last[0] and last[1] != flow_rate):
+                self.flow_samples.append(timestamp, flow_rate)
+        return new_tap
+
+    def tap_events_as_dicts(self, count=None):
+        """Return the newest tap events, newest first."""
+        return _as_dicts(self.tap_events, count)
+
+    def flow_samples_as_dicts(self, count=None):
+        """Return the newest flow samples, newest first."""
+        return _as_dicts(self.flow_samples, count)
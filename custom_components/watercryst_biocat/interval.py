@@ -0,0 +1,25 @@
+"""Adaptive polling interval for Watercryst Biocat."""
+
+
+class AdaptiveInterval:
+    """Polling interval that backs off exponentially while the device is idle.
+
+    While the device is active (water flowing or a micro-leakage measurement
+    running) the interval drops to the floor. Every idle poll multiplies it
+    by the back-off factor until the ceiling is reached.
+    """
+
+    def __init__(self, floor, ceiling, factor=2.0):
+        """Initialize the interval at its floor."""
+        self.floor = floor
+        self.ceiling = max(floor, ceiling)
+        self.factor = factor
+        self.current = floor
+
+    def update(self, active):
+        """Update the interval after a poll and return it in seconds."""
+        if active:
+            self.current = self.floor
+        else:
+            self.current = min(self.ceiling, self.current * self.factor)
+        return self.current
@@ -0,0 +1,225 @@
+"""Request and update cycle metrics for Watercryst Biocat."""
+from collections import Counter, deque
+import logging
+import time
+
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+# Obergrenzen der Histogramm-Klassen in Millisekunden
+HISTOGRAM_BOUNDS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Anzahl der aufbewahrten Profile von Aktualisierungszyklen
+PROFILE_HISTORY = 20
+
+# Ergebnisse von Anfragen, die nicht als Fehler zählen
+SUCCESS_OUTCOMES = ("success", "not_modified")
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in milliseconds."""
+
+    __slots__ = ("buckets", "count", "total", "max")
+
+    def __init__(self):
+        """Initialize an empty histogram."""
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Add a duration in milliseconds."""
+        index = 0
+        while index < len(HISTOGRAM_BOUNDS_MS) and value > HISTOGRAM_BOUNDS_MS[index]:
+            index += 1
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self):
+        """Return the histogram with its buckets keyed by upper bound."""
+        labels = [f"<={bound}" for bound in HISTOGRAM_BOUNDS_MS] + [f">{HISTOGRAM_BOUNDS_MS[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else None,
+            "max_ms": round(self.max, 2),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class EndpointMetrics:
+    """Timings, outcomes and received bytes of one endpoint."""
+
+    __slots__ = ("dns", "connect", "ttfb", "total", "outcomes", "bytes")
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.dns = Histogram()
+        self.connect = Histogram()
+        self.ttfb = Histogram()
+        self.total = Histogram()
+        self.outcomes = Counter()
+        self.bytes = 0
+
+    def as_dict(self):
+        """Return the metrics as a dict."""
+        return {
+            "dns": self.dns.as_dict(),
+            "connect": self.connect.as_dict(),
+            "ttfb": self.ttfb.as_dict(),
+            "total": self.total.as_dict(),
+            "outcomes": dict(self.outcomes),
+            "bytes": self.bytes,
+        }
+
+
+def _elapsed_ms(start):
+    """Return the milliseconds since a perf_counter value."""
+    return (time.perf_counter() - start) * 1000
+
+
+class RequestMetrics:
+    """Per-endpoint request metrics of an API client.
+
+    DNS, connect and time-to-first-byte are measured with an aiohttp trace
+    config; requests opt in by passing their endpoint as trace_request_ctx.
+    The client itself records the total duration, the outcome and the size
+    of each response.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.endpoints = {}
+
+    def endpoint(self, endpoint):
+        """Return the metrics of an endpoint."""
+        if (metrics := self.endpoints.get(endpoint)) is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        return metrics
+
+    @property
+    def errors(self):
+        """Return the number of failed requests of all endpoints."""
+        return sum(
+            count
+            for metrics in self.endpoints.values()
+            for outcome, count in metrics.outcomes.items()
+            if outcome not in SUCCESS_OUTCOMES
+        )
+
+    def trace_config(self):
+        """Return an aiohttp trace config feeding the histograms."""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            endpoint = context.trace_request_ctx
+            context.metrics = self.endpoint(endpoint) if isinstance(endpoint, str) else None
+            context.start = time.perf_counter()
+
+        async def on_dns_resolvehost_start(session, context, params):
+            context.dns_start = time.perf_counter()
+
+        async def on_dns_resolvehost_end(session, context, params):
+            if context.metrics is not None:
+                context.metrics.dns.observe(_elapsed_ms(context.dns_start))
+
+        async def on_connection_create_start(session, context, params):
+            context.connect_start = time.perf_counter()
+
+        async def on_connection_create_end(session, context, params):
+            if context.metrics is not None:
+                context.metrics.connect.observe(_elapsed_ms(context.connect_start))
+
+        async def on_request_end(session, context, params):
+            # Antwort-Header sind eingetroffen
+            if context.metrics is not None:
+                context.metrics.ttfb.observe(_elapsed_ms(context.start))
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_dns_resolvehost_start.append(on_dns_resolvehost_start)
+        trace_config.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        trace_config.on_connection_create_start.append(on_connection_create_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    def as_dict(self):
+        """Return the metrics of all endpoints."""
+        return {endpoint: metrics.as_dict() for endpoint, metrics in self.endpoints.items()}
+
+
+class CycleTimer:
+    """Times the phases of one coordinator update cycle."""
+
+    __slots__ = ("_metrics", "_start", "_last", "phases")
+
+    def __init__(self, metrics):
+        """Start timing."""
+        self._metrics = metrics
+        self._start = self._last = time.perf_counter()
+        self.phases = {} if metrics.profiling else None
+
+    def mark(self, phase):
+        """End a phase; only recorded while profiling."""
+        if self.phases is not None:
+            now = time.perf_counter()
+            self.phases[phase] = round((now - self._last) * 1000, 3)
+            self._last = now
+
+    def finish(self, endpoints):
+        """Record the cycle duration and, while profiling, its profile."""
+        duration = _elapsed_ms(self._start)
+        self._metrics.record_cycle(duration, endpoints, self.phases)
+        return duration
+
+
+class CycleMetrics:
+    """Update cycle durations of a coordinator and the profiling hook.
+
+    While profiling is enabled, every cycle records how long each of its
+    phases took. The profiles are logged and the last ones are kept for
+    diagnostics.
+    """
+
+    def __init__(self):
+        """Initialize empty metrics."""
+        self.cycles = Histogram()
+        self.notify = Histogram()
+        self.profiling = False
+        self.profiles = deque(maxlen=PROFILE_HISTORY)
+
+    def start_cycle(self):
+        """Return a timer for a new update cycle."""
+        return CycleTimer(self)
+
+    def set_profiling(self, enabled):
+        """Enable or disable profiling."""
+        self.profiling = enabled
+        if not enabled:
+            self.profiles.clear()
+
+    def record_cycle(self, duration, endpoints, phases):
+        """Record a finished update cycle."""
+        self.cycles.observe(duration)
+        if phases is not None:
+            profile = {"endpoints": list(endpoints), "total_ms": round(duration, 3), **phases}
+            self.profiles.append(profile)
+            _LOGGER.info("Update cycle profile: %s", profile)
+
+    def record_notify(self, duration):
+        """Record the time spent notifying the entities after a cycle."""
+        self.notify.observe(duration)
+        if self.profiling and self.profiles:
+            self.profiles[-1]["notify_ms"] = round(duration, 3)
+
+    def as_dict(self):
+        """Return the metrics as a dict."""
+        return {
+            "cycles": self.cycles.as_dict(),
+            "notify": self.notify.as_dict(),
+            "profiling": self.profiling,
+            "profiles": list(self.profiles),
+        }
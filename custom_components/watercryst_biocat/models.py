@@ -0,0 +1,268 @@
+"""Data models for Watercryst Biocat."""
+from datetime import datetime, timezone
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def json_loads(data):
+    """Decode a JSON document, using orjson when it is available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def leakage_protection_paused(until, now=None):
+    """Return whether a pauseLeakageProtectionUntilUTC value is in the future."""
+    if not until:
+        return False
+    try:
+        until = datetime.fromisoformat(until)
+    except (TypeError, ValueError):
+        return True
+    if until.tzinfo is None:
+        until = until.replace(tzinfo=timezone.utc)
+    return until > (now or datetime.now(timezone.utc))
+
+
+def parse_statistics(payload):
+    """Parse a statistics range response into (hour start, value) tuples.
+
+    The response is a list of {"timestamp": ..., "value": ...} objects,
+    one per hour: the ISO 8601 start of the hour and the cumulative
+    consumption at its end. Timestamps without a time zone are UTC.
+    """
+    points = []
+    for item in payload:
+        try:
+            start = datetime.fromisoformat(item["timestamp"])
+            value = float(item["value"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if start.tzinfo is None:
+            start = start.replace(tzinfo=timezone.utc)
+        points.append((start, value))
+    points.sort()
+    return points
+
+
+def significant_change(old, new, threshold=0):
+    """Return whether a sensor should write the change from old to new."""
+    if old == new:
+        return False
+    if not threshold or not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+        return True
+    # Übergänge von und nach 0 (z. B. Wasser fließt) immer schreiben
+    if (old == 0) != (new == 0):
+        return True
+    return abs(new - old) >= threshold
+
+
+# Kategorien von Ereignissen, die als Alarm gelten
+ALARM_CATEGORIES = ("alarm", "error", "leakage")
+
+
+class DeviceEvent:
+    """An event reported by the device (information, warning or alarm)."""
+
+    __slots__ = ("id", "timestamp", "category", "title", "description", "acknowledged")
+
+    def __init__(self, event_id, timestamp, category=None, title=None, description=None, acknowledged=False):
+        """Initialize the event."""
+        self.id = event_id
+        self.timestamp = timestamp
+        self.category = category
+        self.title = title
+        self.description = description
+        self.acknowledged = acknowledged
+
+    @property
+    def is_alarm(self):
+        """Return whether the event is an alarm."""
+        return (self.category or "").lower() in ALARM_CATEGORIES
+
+    def as_dict(self):
+        """Return the event as a dict with an ISO timestamp."""
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp.isoformat(),
+            "category": self.category,
+            "title": self.title,
+            "description": self.description,
+            "acknowledged": self.acknowledged,
+        }
+
+
+def parse_events(payload):
+    """Parse an events response into DeviceEvents, oldest first.
+
+    The response is a list of {"id", "timestamp", "category", "title",
+    "description", "acknowledged"} objects. Events without an id or a
+    valid timestamp are skipped; timestamps without a time zone are UTC.
+    """
+    events = []
+    for item in payload:
+        try:
+            timestamp = datetime.fromisoformat(item["timestamp"])
+            event_id = str(item["id"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        events.append(
+            DeviceEvent(
+                event_id,
+                timestamp,
+                item.get("category"),
+                item.get("title"),
+                item.get("description"),
+                bool(item.get("acknowledged")),
+            )
+        )
+    events.sort(key=lambda event: event.timestamp)
+    return events
+
+
+# Schlüssel der Entitäten (API-Namen) und zugehörige Attribute
+FIELDS = {
+    "cumulativeWaterConsumption": "cumulative_water_consumption",
+    "hourlyWaterConsumption": "hourly_water_consumption",
+    "dailyWaterConsumption": "daily_water_consumption",
+    "weeklyWaterConsumption": "weekly_water_consumption",
+    "monthlyWaterConsumption": "monthly_water_consumption",
+    "online": "online",
+    "mode": "mode",
+    "mlState": "ml_state",
+    "absenceModeEnabled": "absence_mode_enabled",
+    "pauseLeakageProtectionUntilUTC": "pause_leakage_protection_until_utc",
+    "waterTemp": "water_temp",
+    "pressure": "pressure",
+    "flowRate": "flow_rate",
+    "lastWaterTapVolume": "last_water_tap_volume",
+    "lastWaterTapDuration": "last_water_tap_duration",
+    "measurementsPollInterval": "measurements_poll_interval",
+    "updateDuration": "update_duration",
+    "apiErrors": "api_errors",
+    "continuousFlow": "continuous_flow",
+    "pressureDecay": "pressure_decay",
+    "unusualConsumption": "unusual_consumption",
+    "openAlarms": "open_alarms",
+}
+
+
+class StateSnapshot:
+    """Parsed response of the /state endpoint."""
+
+    __slots__ = (
+        "online",
+        "mode",
+        "ml_state",
+        "absence_mode_enabled",
+        "pause_leakage_protection_until_utc",
+    )
+
+    def __init__(self, payload):
+        """Extract the state values from the decoded JSON."""
+        water_protection = payload.get("waterProtection") or {}
+        self.online = payload.get("online")
+        self.mode = (payload.get("mode") or {}).get("name")
+        self.ml_state = payload.get("mlState")
+        self.absence_mode_enabled = water_protection.get("absenceModeEnabled")
+        self.pause_leakage_protection_until_utc = water_protection.get("pauseLeakageProtectionUntilUTC")
+
+
+class MeasurementsSnapshot:
+    """Parsed response of the /measurements/direct endpoint."""
+
+    __slots__ = (
+        "water_temp",
+        "pressure",
+        "flow_rate",
+        "last_water_tap_volume",
+        "last_water_tap_duration",
+    )
+
+    def __init__(self, payload):
+        """Extract the measurement values from the decoded JSON."""
+        self.water_temp = payload.get("waterTemp")
+        self.pressure = payload.get("pressure")
+        self.flow_rate = payload.get("flowRate")
+        self.last_water_tap_volume = payload.get("lastWaterTapVolume")
+        self.last_water_tap_duration = payload.get("lastWaterTapDuration")
+
+
+class ApiSnapshot:
+    """Consolidated result of one fetch of several endpoints.
+
+    Every endpoint has an attribute of the same name holding its parsed
+    result: the cumulative value, a StateSnapshot, a MeasurementsSnapshot
+    and a list of new DeviceEvents. It is None if the endpoint was not
+    requested or its request failed.
+    """
+
+    __slots__ = ("cumulative", "state", "measurements", "events", "fetched")
+
+    def __init__(self, results):
+        """Initialize from a dict mapping endpoints to their results."""
+        self.cumulative = results.get("cumulative")
+        self.state = results.get("state")
+        self.measurements = results.get("measurements")
+        self.events = results.get("events")
+        self.fetched = tuple(results)
+
+    @property
+    def results(self):
+        """Return a dict mapping every requested endpoint to its result."""
+        return {endpoint: getattr(self, endpoint) for endpoint in self.fetched}
+
+    @property
+    def failed(self):
+        """Return the requested endpoints whose request failed."""
+        return [endpoint for endpoint in self.fetched if getattr(self, endpoint) is None]
+
+
+class WatercrystData:
+    """All values of a config entry as read by the entities."""
+
+    __slots__ = tuple(FIELDS.values())
+
+    def __init__(self):
+        """Initialize all values as unknown."""
+        for attr in self.__slots__:
+            setattr(self, attr, None)
+
+    def copy(self):
+        """Return a shallow copy."""
+        data = WatercrystData.__new__(WatercrystData)
+        for attr in self.__slots__:
+            setattr(data, attr, getattr(self, attr))
+        return data
+
+    def apply(self, snapshot):
+        """Copy the values of an endpoint snapshot."""
+        for attr in snapshot.__slots__:
+            setattr(self, attr, getattr(snapshot, attr))
+
+    def changed_fields(self, previous):
+        """Return the entity keys whose value differs from previous."""
+        if previous is None:
+            return set(FIELDS)
+        return {
+            key for key, attr in FIELDS.items()
+            if getattr(self, attr) != getattr(previous, attr)
+        }
+
+    def as_dict(self):
+        """Return the values keyed by entity key."""
+        return {key: getattr(self, attr) for key, attr in FIELDS.items()}
+
+    @classmethod
+    def from_dict(cls, values):
+        """Return data from values keyed by entity key (see as_dict)."""
+        data = cls()
+        for key, attr in FIELDS.items():
+            setattr(data, attr, values.get(key))
+        return data
@@ -0,0 +1,66 @@
+"""Webhook push ingestion for Watercryst Biocat."""
+import logging
+
+from aiohttp import web
+
+from homeassistant.components import webhook
+from homeassistant.const import CONF_WEBHOOK_ID
+from homeassistant.core import callback
+
+from .api import ENDPOINT_CUMULATIVE, ENDPOINT_EVENTS, ENDPOINT_MEASUREMENTS, ENDPOINT_STATE
+from .models import MeasurementsSnapshot, StateSnapshot, json_loads, parse_events
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_push_payload(payload):
+    """Return the endpoint results contained in a pushed payload.
+
+    The payload is a JSON object with any of the keys "cumulative" (the
+    cumulative consumption), "state", "measurements" and "events". The
+    latter three have the same shape as the responses of the polled
+    endpoints; state and measurements must be complete, since a snapshot
+    replaces all values of its endpoint, while events may be just the new
+    ones.
+    """
+    results = {}
+    if (cumulative := payload.get("cumulative")) is not None:
+        results[ENDPOINT_CUMULATIVE] = float(cumulative)
+    if isinstance(state := payload.get("state"), dict):
+        results[ENDPOINT_STATE] = StateSnapshot(state)
+    if isinstance(measurements := payload.get("measurements"), dict):
+        results[ENDPOINT_MEASUREMENTS] = MeasurementsSnapshot(measurements)
+    if isinstance(events := payload.get("events"), list):
+        results[ENDPOINT_EVENTS] = parse_events(events)
+    return results
+
+
+@callback
+def async_register_push(hass, entry, coordinator):
+    """Register the webhook of a config entry."""
+    webhook_id = entry.data[CONF_WEBHOOK_ID]
+
+    async def async_handle_webhook(hass, webhook_id, request):
+        """Merge a pushed update into the coordinator data."""
+        try:
+            payload = json_loads(await request.read())
+            results = parse_push_payload(payload) if isinstance(payload, dict) else None
+        except (TypeError, ValueError):
+            results = None
+        if not results:
+            _LOGGER.warning("Ignoring invalid push update")
+            return web.Response(status=400)
+
+        _LOGGER.debug("Push update received for: %s", ", ".join(results))
+        coordinator.async_handle_push(results)
+        return web.Response(status=200)
+
+    webhook.async_register(
+        hass,
+        entry.domain,
+        "Watercryst Biocat",
+        webhook_id,
+        async_handle_webhook,
+        allowed_methods=["POST"],
+    )
+    entry.async_on_unload(lambda: webhook.async_unregister(hass, webhook_id))
@@ -0,0 +1,86 @@
+"""Recording of raw API responses for Watercryst Biocat."""
+import heapq
+import os
+import struct
+import time
+
+# Ein Datensatz: Zeitstempel (Unix, float64), Länge (uint32), dann der Antworttext
+RECORD_HEADER = struct.Struct("<dI")
+RECORDING_SUFFIX = ".rec"
+
+
+def recording_path(directory, endpoint):
+    """Return the path of the recording of an endpoint."""
+    return os.path.join(directory, f"{endpoint}{RECORDING_SUFFIX}")
+
+
+def write_records(directory, chunks):
+    """Append encoded records to the recordings in a directory.
+
+    chunks maps each endpoint to the bytes returned by
+    ResponseRecorder.take(). This does blocking file I/O.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for endpoint, chunk in chunks.items():
+        with open(recording_path(directory, endpoint), "ab") as file:
+            file.write(chunk)
+
+
+def read_records(path):
+    """Yield the (timestamp, body) records of a recording, oldest first."""
+    with open(path, "rb") as file:
+        while header := file.read(RECORD_HEADER.size):
+            if len(header) < RECORD_HEADER.size:
+                return
+            timestamp, length = RECORD_HEADER.unpack(header)
+            body = file.read(length)
+            if len(body) < length:
+                # Unvollständiger letzter Datensatz (z. B. beim Beenden abgebrochen)
+                return
+            yield timestamp, body
+
+
+def _read_endpoint_records(directory, endpoint):
+    """Yield the (timestamp, endpoint, body) records of one recording."""
+    for timestamp, body in read_records(recording_path(directory, endpoint)):
+        yield timestamp, endpoint, body
+
+
+def read_recordings(directory):
+    """Yield the (timestamp, endpoint, body) records of all recordings in time order."""
+    streams = [
+        _read_endpoint_records(directory, name[: -len(RECORDING_SUFFIX)])
+        for name in sorted(os.listdir(directory))
+        if name.endswith(RECORDING_SUFFIX)
+    ]
+    return heapq.merge(*streams, key=lambda record: record[0])
+
+
+class ResponseRecorder:
+    """Buffer of raw endpoint responses to be appended to recordings.
+
+    Recording only appends to an in-memory buffer per endpoint, so it is
+    cheap enough to run in the event loop; take() hands the buffered
+    records over to be written with write_records() outside of it. Every
+    endpoint has its own append-only file of length-prefixed records.
+    """
+
+    def __init__(self, directory):
+        """Initialize an empty buffer."""
+        self.directory = directory
+        self._buffers = {}
+        self.records = 0
+
+    def record(self, endpoint, body, timestamp=None):
+        """Buffer a raw response body of an endpoint."""
+        if (buffer := self._buffers.get(endpoint)) is None:
+            buffer = self._buffers[endpoint] = bytearray()
+        buffer += RECORD_HEADER.pack(time.time() if timestamp is None else timestamp, len(body))
+        buffer += body
+        self.records += 1
+
+    def take(self):
+        """Return and clear the buffered records, keyed by endpoint."""
+        chunks = {endpoint: bytes(buffer) for endpoint, buffer in self._buffers.items() if buffer}
+        self._buffers.clear()
+        return chunks
@@ -0,0 +1,155 @@
+"""Pre-aggregated consumption rollups for Watercryst Biocat."""
+from array import array
+from datetime import date, datetime, timedelta
+
+PERIOD_HOUR = "hour"
+PERIOD_DAY = "day"
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+
+# Anzahl der aufbewahrten Perioden je Auflösung
+ROLLUP_SIZES = {
+    PERIOD_HOUR: 48,
+    PERIOD_DAY: 62,
+    PERIOD_WEEK: 53,
+    PERIOD_MONTH: 24,
+}
+
+# Leere Buckets tragen diesen Schlüssel
+NO_PERIOD = -1
+
+
+def consumption_delta(previous, cumulative):
+    """Return the consumption between two values of the cumulative counter."""
+    if previous is None:
+        return 0.0
+    delta = cumulative - previous
+    if delta < 0:
+        # Zähler wurde zurückgesetzt: alles seit dem Zurücksetzen zählt
+        delta = cumulative
+    return delta
+
+
+def period_key(period, local_time):
+    """Return the number of the calendar period containing a local time.
+
+    Keys are consecutive integers (hours, days, Mondays as day ordinals,
+    months since year 0), so older periods always have smaller keys.
+    """
+    day = local_time.date()
+    if period == PERIOD_HOUR:
+        return day.toordinal() * 24 + local_time.hour
+    if period == PERIOD_DAY:
+        return day.toordinal()
+    if period == PERIOD_WEEK:
+        return day.toordinal() - day.weekday()
+    return day.year * 12 + day.month - 1
+
+
+def period_start(period, key):
+    """Return the local start of the period with the given key as a naive datetime."""
+    if period == PERIOD_HOUR:
+        return datetime.combine(date.fromordinal(key // 24), datetime.min.time()) + timedelta(hours=key % 24)
+    if period in (PERIOD_DAY, PERIOD_WEEK):
+        return datetime.combine(date.fromordinal(key), datetime.min.time())
+    return datetime(key // 12, key % 12 + 1, 1)
+
+
+class Rollup:
+    """Consumption totals of the most recent periods of one resolution.
+
+    Bucket i holds the total of the period whose key is congruent to i
+    modulo the size. The keys and totals live in two preallocated arrays,
+    so adding a delta is a constant-time update that never allocates;
+    a bucket is cleared when a new period reuses it.
+    """
+
+    __slots__ = ("period", "size", "_keys", "_totals")
+
+    def __init__(self, period, size):
+        """Initialize empty buckets."""
+        self.period = period
+        self.size = size
+        self._keys = array("q", [NO_PERIOD]) * size
+        self._totals = array("d", bytes(8 * size))
+
+    def add(self, key, delta):
+        """Add a delta to the period with the given key."""
+        index = key % self.size
+        if self._keys[index] != key:
+            if self._keys[index] > key:
+                # Älter als der gespeicherte Zeitraum
+                return
+            self._keys[index] = key
+            self._totals[index] = 0.0
+        self._totals[index] += delta
+
+    def total(self, key):
+        """Return the total of a period, 0 if nothing was recorded in it."""
+        index = key % self.size
+        return self._totals[index] if self._keys[index] == key else 0.0
+
+    def buckets(self):
+        """Return (key, total) of all recorded periods, newest first."""
+        return sorted(
+            ((key, total) for key, total in zip(self._keys, self._totals) if key != NO_PERIOD),
+            reverse=True,
+        )
+
+    def as_dict(self):
+        """Return the buckets for storage."""
+        return {"keys": self._keys.tolist(), "totals": self._totals.tolist()}
+
+    def load(self, data):
+        """Restore buckets saved by as_dict, dropping them if the size changed."""
+        keys, totals = data.get("keys", []), data.get("totals", [])
+        if len(keys) == len(totals) == self.size:
+            self._keys = array("q", keys)
+            self._totals = array("d", totals)
+
+
+class ConsumptionRollups:
+    """Hourly, daily, weekly and monthly consumption rollups.
+
+    Every delta of the cumulative counter is added once to each
+    resolution, so the current totals and the recent history are always
+    ready to read and never have to be summed up from raw samples.
+    """
+
+    def __init__(self, sizes=ROLLUP_SIZES):
+        """Initialize empty rollups."""
+        self.rollups = {period: Rollup(period, size) for period, size in sizes.items()}
+
+    def add(self, delta, local_time):
+        """Add a consumption delta at a local time."""
+        for period, rollup in self.rollups.items():
+            rollup.add(period_key(period, local_time), delta)
+
+    def current(self, period, local_time):
+        """Return the total of the period containing a local time."""
+        return self.rollups[period].total(period_key(period, local_time))
+
+    def as_dicts(self, period, count=None, before=None):
+        """Return the newest period totals as dicts with an ISO start, newest first.
+
+        With a local time as before, only the periods ending before the
+        period containing it are returned.
+        """
+        buckets = self.rollups[period].buckets()
+        if before is not None:
+            current = period_key(period, before)
+            buckets = [bucket for bucket in buckets if bucket[0] < current]
+        return [
+            {"start": period_start(period, key).isoformat(), "volume": total}
+            for key, total in buckets[:count]
+        ]
+
+    def as_dict(self):
+        """Return all rollups for storage."""
+        return {period: rollup.as_dict() for period, rollup in self.rollups.items()}
+
+    def load(self, data):
+        """Restore rollups saved by as_dict."""
+        for period, rollup in self.rollups.items():
+            if period in data:
+                rollup.load(data[period])
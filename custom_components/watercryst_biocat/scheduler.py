@@ -0,0 +1,76 @@
+"""Domain-wide poll scheduling for Watercryst Biocat."""
+import asyncio
+import logging
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import callback
+
+from .api import WatercrystApiClient
+from .const import DATA_SCHEDULER, MAX_CONCURRENT_POLLS
+
+_LOGGER = logging.getLogger(__name__)
+
+# Goldener Schnitt: verteilt aufeinanderfolgende Slots gleichmäßig über das Intervall
+_PHASE_STEP = 0.6180339887
+
+
+class WatercrystScheduler:
+    """Scheduling shared by all Watercryst Biocat config entries.
+
+    Config entries with the same API key share one API client and thus one
+    connection pool. Every entry gets a slot whose phase offsets its first
+    scheduled poll, so entries set up together do not keep polling in
+    lockstep. A semaphore caps how many entries poll at the same time.
+    """
+
+    def __init__(self):
+        """Initialize the scheduler."""
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENT_POLLS)
+        self._clients = {}
+        self._slots = {}
+
+    @callback
+    def async_get_client(self, api_key):
+        """Return the shared client of an API key."""
+        if api_key not in self._clients:
+            self._clients[api_key] = [WatercrystApiClient(api_key), 0]
+        self._clients[api_key][1] += 1
+        return self._clients[api_key][0]
+
+    async def async_release_client(self, api_key):
+        """Release a client and close it once no entry uses it anymore."""
+        if (client_ref := self._clients.get(api_key)) is None:
+            return
+        client_ref[1] -= 1
+        if client_ref[1] <= 0:
+            del self._clients[api_key]
+            await client_ref[0].close()
+
+    @callback
+    def async_register_entry(self, entry_id):
+        """Assign a slot to an entry and return its phase (0..1)."""
+        slot = 0
+        while slot in self._slots.values():
+            slot += 1
+        self._slots[entry_id] = slot
+        return (slot * _PHASE_STEP) % 1
+
+    @callback
+    def async_unregister_entry(self, entry_id):
+        """Free the slot of an entry."""
+        self._slots.pop(entry_id, None)
+
+    async def async_close(self, event=None):
+        """Close all clients."""
+        clients = [client for client, _ in self._clients.values()]
+        self._clients.clear()
+        await asyncio.gather(*(client.close() for client in clients))
+
+
+@callback
+def async_get_scheduler(hass):
+    """Return the scheduler, creating it on first use."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = WatercrystScheduler()
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, scheduler.async_close)
+    return scheduler
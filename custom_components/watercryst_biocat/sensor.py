@@ -1,124 +1,92 @@
 """Sensor handling for Watercryst Biocat."""
 import logging
-import aiohttp
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
+from homeassistant.const import UnitOfVolume
+from homeassistant.core import callback
+from homeassistant.helpers.device_registry import DeviceEntryType
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity import Entity, EntityCategory
 from . import DOMAIN
+from .api import ENDPOINT_CUMULATIVE, ENDPOINT_EVENTS, ENDPOINT_MEASUREMENTS, ENDPOINT_STATE
+from .const import THRESHOLD_OPTIONS
+from .models import FIELDS, significant_change
+from .rollups import PERIOD_DAY, PERIOD_HOUR, PERIOD_MONTH, PERIOD_WEEK
 
 _LOGGER = logging.getLogger(__name__)
 
+# Anzahl der Zapfvorgänge im Attribut des Zapfvolumen-Sensors
+TAP_EVENTS_ATTRIBUTE_COUNT = 10
+
+# Anzahl der Ereignisse im Attribut des Alarm-Sensors
+EVENTS_ATTRIBUTE_COUNT = 10
+
+# Anzahl der vorherigen Perioden im Attribut der Verbrauchssensoren
+ROLLUP_ATTRIBUTE_COUNT = 7
+
+# Sensoren mit Verlaufsattributen, die sich ohne ihren Wert ändern können (z. B. ein
+# gleicher Zapfvorgang): bei jeder Abfrage ihres Endpunkts benachrichtigen
+HISTORY_SENSORS = ("lastWaterTapVolume", "openAlarms")
+
 # Definition der verfügbaren Sensoren
 SENSORS = {
-    "cumulativeWaterConsumption": {"name": "Kumulativer Wasserverbrauch", "unit": "L", "icon": "mdi:chart-bar"},
+    "cumulativeWaterConsumption": {"name": "Kumulativer Wasserverbrauch", "unit": UnitOfVolume.LITERS, "icon": "mdi:chart-bar", "endpoint": ENDPOINT_CUMULATIVE, "device_class": SensorDeviceClass.WATER, "state_class": SensorStateClass.TOTAL_INCREASING},
 }
 
+# Verbrauch der laufenden Stunde, des Tages, der Woche und des Monats (für das Energie-Dashboard);
+# beginnt mit jeder Periode wieder bei 0, was total_increasing als neuen Zyklus erkennt
 SENSORS.update({
-    "online": {"name": "Online-Status", "unit": None, "icon": "mdi:cloud-check"},
-    "mode": {"name": "Modus", "unit": None, "icon": "mdi:water"},
-    "mlState": {"name": "Mikroleckageschutz-Zustand", "unit": None, "icon": "mdi:robot"},
-    "absenceModeEnabled": {"name": "Abwesenheitsmodus aktiviert", "unit": None, "icon": "mdi:shield-home"},
-    "pauseLeakageProtectionUntilUTC": {"name": "Leckageschutz pausiert bis", "unit": None, "icon": "mdi:clock-outline"},
+    "hourlyWaterConsumption": {"name": "Wasserverbrauch diese Stunde", "unit": UnitOfVolume.LITERS, "icon": "mdi:water-outline", "endpoint": ENDPOINT_CUMULATIVE, "device_class": SensorDeviceClass.WATER, "state_class": SensorStateClass.TOTAL_INCREASING, "rollup": PERIOD_HOUR},
+    "dailyWaterConsumption": {"name": "Wasserverbrauch heute", "unit": UnitOfVolume.LITERS, "icon": "mdi:water-outline", "endpoint": ENDPOINT_CUMULATIVE, "device_class": SensorDeviceClass.WATER, "state_class": SensorStateClass.TOTAL_INCREASING, "rollup": PERIOD_DAY},
+    "weeklyWaterConsumption": {"name": "Wasserverbrauch diese Woche", "unit": UnitOfVolume.LITERS, "icon": "mdi:water-outline", "endpoint": ENDPOINT_CUMULATIVE, "device_class": SensorDeviceClass.WATER, "state_class": SensorStateClass.TOTAL_INCREASING, "rollup": PERIOD_WEEK},
+    "monthlyWaterConsumption": {"name": "Wasserverbrauch diesen Monat", "unit": UnitOfVolume.LITERS, "icon": "mdi:water-outline", "endpoint": ENDPOINT_CUMULATIVE, "device_class": SensorDeviceClass.WATER, "state_class": SensorStateClass.TOTAL_INCREASING, "rollup": PERIOD_MONTH},
 })
 
 SENSORS.update({
-    "waterTemp": {"name": "Wassertemperatur", "unit": "°C", "icon": "mdi:thermometer"},
-    "pressure": {"name": "Wasserdruck", "unit": "bar", "icon": "mdi:gauge"},
-    "flowRate": {"name": "Durchflussrate", "unit": "L/min", "icon": "mdi:water"},
-    "lastWaterTapVolume": {"name": "Letztes Wasserzapfvolumen", "unit": "L", "icon": "mdi:cup-water"},
-    "lastWaterTapDuration": {"name": "Dauer des letzten Wasserzapfens", "unit": "s", "icon": "mdi:timer"},
+    "online": {"name": "Online-Status", "unit": None, "icon": "mdi:cloud-check", "endpoint": ENDPOINT_STATE},
+    "mode": {"name": "Modus", "unit": None, "icon": "mdi:water", "endpoint": ENDPOINT_STATE},
+    "mlState": {"name": "Mikroleckageschutz-Zustand", "unit": None, "icon": "mdi:robot", "endpoint": ENDPOINT_STATE},
+    "absenceModeEnabled": {"name": "Abwesenheitsmodus aktiviert", "unit": None, "icon": "mdi:shield-home", "endpoint": ENDPOINT_STATE},
+    "pauseLeakageProtectionUntilUTC": {"name": "Leckageschutz pausiert bis", "unit": None, "icon": "mdi:clock-outline", "endpoint": ENDPOINT_STATE},
 })
 
-async def fetch_data(api_key):
-    """Fetch data from the Watercryst Biocat API."""
-    headers = {"accept": "application/json", "x-api-key": api_key}
-    url = "https://appapi.watercryst.com/v1/statistics/cumulative/daily"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            _LOGGER.debug("Sending request to API: %s", url)
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.text()  # API gibt nur einen Wert zurück, kein JSON
-                _LOGGER.debug("Fetched data from API: %s", data)
-                return float(data)  # Konvertiere den Wert in eine Zahl
-        except aiohttp.ClientResponseError as e:
-            _LOGGER.error("Error fetching data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
-            return None
-        except Exception as e:
-            _LOGGER.error("Unexpected error: %s", e)
-            return None
-
-async def fetch_state_data(api_key):
-    """Fetch state data from the Watercryst Biocat API."""
-    headers = {"accept": "application/json", "x-api-key": api_key}
-    url = "https://appapi.watercryst.com/v1/state"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            _LOGGER.debug("Sending request to API: %s", url)
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()  # API gibt JSON zurück
-                _LOGGER.debug("Fetched state data from API: %s", data)
-                return data
-        except aiohttp.ClientResponseError as e:
-            _LOGGER.error("Error fetching state data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
-            return None
-        except Exception as e:
-            _LOGGER.error("Unexpected error: %s", e)
-            return None
-
-async def fetch_measurements_data(api_key):
-    """Fetch measurement data from the Watercryst Biocat API."""
-    headers = {"accept": "application/json", "x-api-key": api_key}
-    url = "https://appapi.watercryst.com/v1/measurements/direct"
-
-    async with aiohttp.ClientSession() as session:
-        try:
-            _LOGGER.debug("Sending request to API: %s", url)
-            async with session.get(url, headers=headers) as response:
-                response.raise_for_status()
-                data = await response.json()  # API gibt JSON zurück
-                _LOGGER.debug("Fetched measurement data from API: %s", data)
-                return data
-        except aiohttp.ClientResponseError as e:
-            _LOGGER.error("Error fetching measurement data from API: %s, status: %s, url: %s", e.message, e.status, e.request_info.url)
-            return None
-        except Exception as e:
-            _LOGGER.error("Unexpected error: %s", e)
-            return None
-
-async def async_update_data(api_key):
-    """Fetch data from the API."""
-    from .sensor import fetch_data, fetch_state_data
-    _LOGGER.debug("Starting data update...")
+SENSORS.update({
+    "waterTemp": {"name": "Wassertemperatur", "unit": "°C", "icon": "mdi:thermometer", "endpoint": ENDPOINT_MEASUREMENTS},
+    "pressure": {"name": "Wasserdruck", "unit": "bar", "icon": "mdi:gauge", "endpoint": ENDPOINT_MEASUREMENTS},
+    "flowRate": {"name": "Durchflussrate", "unit": "L/min", "icon": "mdi:water", "endpoint": ENDPOINT_MEASUREMENTS},
+    "lastWaterTapVolume": {"name": "Letztes Wasserzapfvolumen", "unit": "L", "icon": "mdi:cup-water", "endpoint": ENDPOINT_MEASUREMENTS},
+    "lastWaterTapDuration": {"name": "Dauer des letzten Wasserzapfens", "unit": "s", "icon": "mdi:timer", "endpoint": ENDPOINT_MEASUREMENTS},
+})
 
-    # Abrufen der Daten von beiden APIs
-    cumulative_data = await fetch_data(api_key)
-    state_data = await fetch_state_data(api_key)
+SENSORS.update({
+    "openAlarms": {"name": "Offene Alarme", "unit": None, "icon": "mdi:alarm-light", "endpoint": ENDPOINT_EVENTS},
+})
 
-    if cumulative_data is not None and state_data is not None:
-        _LOGGER.debug("Data fetched successfully: cumulative=%s, state=%s", cumulative_data, state_data)
-        return {
-            "cumulativeWaterConsumption": cumulative_data,
-            "online": state_data.get("online"),
-            "mode": state_data.get("mode", {}).get("name"),
-            "mlState": state_data.get("mlState"),
-            "absenceModeEnabled": state_data.get("waterProtection", {}).get("absenceModeEnabled"),
-            "pauseLeakageProtectionUntilUTC": state_data.get("waterProtection", {}).get("pauseLeakageProtectionUntilUTC"),
-        }
-    _LOGGER.warning("Failed to fetch data from one or both APIs.")
-    return {}
+# Diagnose-Sensoren
+SENSORS.update({
+    "measurementsPollInterval": {"name": "Abfrageintervall Messwerte", "unit": "s", "icon": "mdi:timer-sync", "endpoint": ENDPOINT_MEASUREMENTS, "diagnostic": True},
+    # Standardmäßig deaktiviert, ändern sich bei jeder Abfrage
+    "updateDuration": {"name": "Dauer der Aktualisierung", "unit": "ms", "icon": "mdi:timer-outline", "endpoint": None, "diagnostic": True, "enabled_default": False},
+    "apiErrors": {"name": "API-Fehler", "unit": None, "icon": "mdi:alert-circle-outline", "endpoint": None, "diagnostic": True, "enabled_default": False},
+})
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Watercryst Biocat sensors."""
     _LOGGER.debug("Setting up sensors for Watercryst Biocat...")
     coordinator = hass.data[DOMAIN][entry.entry_id]
 
+    # Mindeständerungen aus den Optionen
+    thresholds = {
+        sensor_type: entry.options.get(option, default)
+        for sensor_type, (option, default) in THRESHOLD_OPTIONS.items()
+    }
+
     # Erstelle Sensoren basierend auf den definierten SENSORS
+    # Verbrauchssensoren mit Zustandsklasse als SensorEntity (Statistiken, Energie-Dashboard)
     sensors = [
-        WatercrystSensor(coordinator, sensor_type, entry.entry_id)
-        for sensor_type in SENSORS
+        (WatercrystConsumptionSensor if "state_class" in sensor else WatercrystSensor)(
+            coordinator, sensor_type, entry.entry_id, thresholds.get(sensor_type, 0)
+        )
+        for sensor_type, sensor in SENSORS.items()
     ]
     _LOGGER.debug("Sensors created: %s", [sensor._name for sensor in sensors])
     async_add_entities(sensors)
@@ -127,14 +95,63 @@ async def async_setup_entry(hass, entry, async_add_entities):
 class WatercrystSensor(CoordinatorEntity):
     """Representation of a Watercryst Biocat sensor."""
 
-    def __init__(self, coordinator, sensor_type, entry_id):
+    def __init__(self, coordinator, sensor_type, entry_id, threshold=0):
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        # Nur benachrichtigen, wenn sich der eigene Wert geändert hat
+        super().__init__(
+            coordinator, context=SENSORS[sensor_type]["endpoint"] if sensor_type in HISTORY_SENSORS else sensor_type
+        )
         self._sensor_type = sensor_type
+        self._field = FIELDS[sensor_type]
         self._name = SENSORS[sensor_type]["name"]
         self._unit = SENSORS[sensor_type]["unit"]
         self._icon = SENSORS[sensor_type]["icon"]
         self._entry_id = entry_id  # Speichere die Konfigurations-ID
+        self._endpoint = SENSORS[sensor_type]["endpoint"]
+        self._threshold = threshold
+        self._written = None
+
+    async def async_added_to_hass(self):
+        """Remember the state written when the entity is added."""
+        await super().async_added_to_hass()
+        self._written = (self.available, self.state, self._data_updated(), self._history_key())
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Write the state only if it, its staleness or its history changed significantly."""
+        data_updated = self._data_updated()
+        history_key = self._history_key()
+        if self._written is not None:
+            available, value, written_updated, written_history_key = self._written
+            if (
+                available == self.available
+                and written_updated == data_updated
+                and written_history_key == history_key
+                and not self._is_significant(value, self.state)
+            ):
+                return
+        self._written = (self.available, self.state, data_updated, history_key)
+        super()._handle_coordinator_update()
+
+    def _history_key(self):
+        """Return what the history attributes depend on, None without any."""
+        if self._sensor_type == "lastWaterTapVolume":
+            return self.coordinator.history.tap_events.last()
+        if self._sensor_type == "openAlarms":
+            return tuple(
+                (event.id, event.acknowledged) for event in self.coordinator.events.latest(EVENTS_ATTRIBUTE_COUNT)
+            )
+        return None
+
+    def _data_updated(self):
+        """Return the ISO time of the last successful update if the value is stale, else None."""
+        if self._endpoint is None:
+            return None
+        return self.coordinator.data_updated(self._endpoint)
+
+    def _is_significant(self, old, new):
+        """Return whether the change from old to new should be written."""
+        return significant_change(old, new, self._threshold)
 
     @property
     def name(self):
@@ -144,7 +161,7 @@ class WatercrystSensor(CoordinatorEntity):
     @property
     def state(self):
         """Return the state of the sensor."""
-        return self.coordinator.data.get(self._sensor_type)
+        return getattr(self.coordinator.data, self._field)
 
     @property
     def unit_of_measurement(self):
@@ -167,18 +184,16 @@ class WatercrystSensor(CoordinatorEntity):
         return f"{self._entry_id}_{self._sensor_type}"
 
     @property
-    def device_class(self):
-        """Return the device class of the sensor."""
-        if self._sensor_type == "cumulativeWaterConsumption":
-            return "water"
+    def entity_category(self):
+        """Return the entity category of the sensor."""
+        if SENSORS[self._sensor_type].get("diagnostic"):
+            return EntityCategory.DIAGNOSTIC
         return None
 
     @property
-    def state_class(self):
-        """Return the state class of the sensor."""
-        if self._sensor_type == "cumulativeWaterConsumption":
-            return "total_increasing"
-        return None
+    def entity_registry_enabled_default(self):
+        """Return if the entity should be enabled when first added."""
+        return SENSORS[self._sensor_type].get("enabled_default", True)
 
     @property
     def device_info(self):
@@ -189,13 +204,40 @@ class WatercrystSensor(CoordinatorEntity):
             "manufacturer": "Watercryst",
             "model": "Biocat",
             "sw_version": "1.5.8",
-            "entry_type": "service",  # Optional: Markiert es als Dienstgerät
+            "entry_type": DeviceEntryType.SERVICE,  # Optional: Markiert es als Dienstgerät
         }
 
     @property
     def extra_state_attributes(self):
         """Return extra attributes for the sensor."""
         attributes = {}
-        if self._sensor_type == "cumulativeWaterConsumption":
-            attributes["state_class"] = "total_increasing"
+        # Letzter gültiger Wert während eines Ausfalls des Endpunkts
+        if (data_updated := self._data_updated()) is not None:
+            attributes["last_successful_update"] = data_updated
+        if (period := SENSORS[self._sensor_type].get("rollup")) is not None:
+            # Abgeschlossene Perioden, bereits vorberechnet
+            attributes["previous_periods"] = self.coordinator.consumption.previous_periods(period, ROLLUP_ATTRIBUTE_COUNT)
+        if self._sensor_type == "openAlarms":
+            attributes["recent_events"] = [event.as_dict() for event in self.coordinator.events.latest(EVENTS_ATTRIBUTE_COUNT)]
+        if self._sensor_type == "lastWaterTapVolume":
+            attributes["recent_tap_events"] = self.coordinator.history.tap_events_as_dicts(TAP_EVENTS_ATTRIBUTE_COUNT)
         return attributes
+
+class WatercrystConsumptionSensor(SensorEntity, WatercrystSensor):
+    """Representation of a Watercryst Biocat water consumption sensor.
+
+    A typed sensor entity, so the recorder keeps long-term statistics and
+    the energy dashboard accepts it as a water source.
+    """
+
+    def __init__(self, coordinator, sensor_type, entry_id, threshold=0):
+        """Initialize the sensor."""
+        super().__init__(coordinator, sensor_type, entry_id, threshold)
+        self._attr_device_class = SENSORS[sensor_type]["device_class"]
+        self._attr_state_class = SENSORS[sensor_type]["state_class"]
+        self._attr_native_unit_of_measurement = self._unit
+
+    @property
+    def native_value(self):
+        """Return the consumption in liters."""
+        return getattr(self.coordinator.data, self._field)
@@ -0,0 +1,168 @@
+"""Services for Watercryst Biocat."""
+import voluptuous as vol
+
+from homeassistant.core import ServiceCall, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+
+from .const import DOMAIN
+from .events import EVENT_LOG_SIZE
+from .history import FLOW_HISTORY_SIZE, TAP_HISTORY_SIZE
+from .rollups import ROLLUP_SIZES
+
+SERVICE_GET_TAP_EVENTS = "get_tap_events"
+SERVICE_SET_PROFILING = "set_profiling"
+SERVICE_GET_CONSUMPTION = "get_consumption"
+SERVICE_GET_EVENTS = "get_events"
+SERVICE_ACKNOWLEDGE_EVENT = "acknowledge_event"
+SERVICE_SET_RECORDING = "set_recording"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_COUNT = "count"
+ATTR_FLOW_SAMPLES = "flow_samples"
+ATTR_ENABLED = "enabled"
+ATTR_PERIOD = "period"
+ATTR_ALARMS_ONLY = "alarms_only"
+ATTR_EVENT_ID = "event_id"
+
+GET_TAP_EVENTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_COUNT, default=10): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=max(TAP_HISTORY_SIZE, FLOW_HISTORY_SIZE))
+        ),
+        vol.Optional(ATTR_FLOW_SAMPLES, default=False): cv.boolean,
+    }
+)
+
+SET_ENABLED_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_ENABLED): cv.boolean,
+    }
+)
+
+GET_CONSUMPTION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Required(ATTR_PERIOD): vol.In(list(ROLLUP_SIZES)),
+        vol.Optional(ATTR_COUNT): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=max(ROLLUP_SIZES.values()))
+        ),
+    }
+)
+
+GET_EVENTS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_COUNT, default=10): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=EVENT_LOG_SIZE)
+        ),
+        vol.Optional(ATTR_ALARMS_ONLY, default=False): cv.boolean,
+    }
+)
+
+ACKNOWLEDGE_EVENT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        vol.Optional(ATTR_EVENT_ID): cv.string,
+    }
+)
+
+
+def _get_coordinator(hass, call: ServiceCall):
+    """Return the coordinator of the config entry named in a service call."""
+    entry_id = call.data[ATTR_CONFIG_ENTRY_ID]
+    if (coordinator := hass.data.get(DOMAIN, {}).get(entry_id)) is None:
+        raise ServiceValidationError(f"Watercryst Biocat entry {entry_id} is not loaded")
+    return coordinator
+
+
+@callback
+def async_setup_services(hass):
+    """Register the services of the integration."""
+
+    @callback
+    def async_get_tap_events(call: ServiceCall):
+        """Return the newest tap events (and flow samples) of an entry."""
+        history = _get_coordinator(hass, call).history
+        count = call.data[ATTR_COUNT]
+        response = {"tap_events": history.tap_events_as_dicts(count)}
+        if call.data[ATTR_FLOW_SAMPLES]:
+            response["flow_samples"] = history.flow_samples_as_dicts(count)
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_TAP_EVENTS,
+        async_get_tap_events,
+        schema=GET_TAP_EVENTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    @callback
+    def async_set_profiling(call: ServiceCall):
+        """Enable or disable profiling of the update cycles of an entry."""
+        _get_coordinator(hass, call).cycle_metrics.set_profiling(call.data[ATTR_ENABLED])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_PROFILING,
+        async_set_profiling,
+        schema=SET_ENABLED_SCHEMA,
+    )
+
+    @callback
+    def async_get_consumption(call: ServiceCall):
+        """Return the consumption per hour, day, week or month of an entry."""
+        rollups = _get_coordinator(hass, call).consumption.rollups
+        return {"periods": rollups.as_dicts(call.data[ATTR_PERIOD], call.data.get(ATTR_COUNT))}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_CONSUMPTION,
+        async_get_consumption,
+        schema=GET_CONSUMPTION_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    @callback
+    def async_get_events(call: ServiceCall):
+        """Return the newest device events of an entry."""
+        events = _get_coordinator(hass, call).events.latest(call.data[ATTR_COUNT], call.data[ATTR_ALARMS_ONLY])
+        return {"events": [event.as_dict() for event in events]}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_EVENTS,
+        async_get_events,
+        schema=GET_EVENTS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def async_acknowledge_event(call: ServiceCall):
+        """Acknowledge a device event by its id, or the current event."""
+        coordinator = _get_coordinator(hass, call)
+        event_id = call.data.get(ATTR_EVENT_ID)
+        if event_id is not None and coordinator.events.get(event_id) is None:
+            raise ServiceValidationError(f"Unknown event {event_id}")
+        if not await coordinator.async_acknowledge_event(event_id):
+            raise HomeAssistantError("Failed to acknowledge the event")
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_ACKNOWLEDGE_EVENT,
+        async_acknowledge_event,
+        schema=ACKNOWLEDGE_EVENT_SCHEMA,
+    )
+
+    async def async_set_recording(call: ServiceCall):
+        """Start or stop recording the raw API responses of an entry."""
+        await _get_coordinator(hass, call).async_set_recording(call.data[ATTR_ENABLED])
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SET_RECORDING,
+        async_set_recording,
+        schema=SET_ENABLED_SCHEMA,
+    )
@@ -1,63 +1,186 @@
 import logging
-import aiohttp
 from homeassistant.components.switch import SwitchEntity
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from . import DOMAIN
+from .api import ENDPOINT_STATE
+from .models import FIELDS, leakage_protection_paused
 
 _LOGGER = logging.getLogger(__name__)
 
-SWITCHES = {
-    "absence_enable": {
-        "name": "Enable Absence Mode",
-        "url": "https://appapi.watercryst.com/v1/absence/enable",
-    },
-    "absence_disable": {
-        "name": "Disable Absence Mode",
-        "url": "https://appapi.watercryst.com/v1/absence/disable",
+# Höchstens so lange (Sekunden) nach einem Befehl auf die Bestätigung durch /state warten
+OPTIMISTIC_TIMEOUT = 60
+
+# Schalter mit Zustand aus den Coordinator-Daten; Befehlspfade relativ zur API-Basis-URL
+STATE_SWITCHES = {
+    "absence_mode": {
+        "name": "Absence Mode",
+        "key": "absenceModeEnabled",
+        "on_path": "/absence/enable",
+        "off_path": "/absence/disable",
     },
-    "leakage_pause": {
+    "leakage_protection_pause": {
         "name": "Pause Leakage Protection",
-        "url": "https://appapi.watercryst.com/v1/leakageprotection/pause",
-    },
-    "leakage_unpause": {
-        "name": "Unpause Leakage Protection",
-        "url": "https://appapi.watercryst.com/v1/leakageprotection/unpause",
+        "key": "pauseLeakageProtectionUntilUTC",
+        "on_path": "/leakageprotection/pause",
+        "off_path": "/leakageprotection/unpause",
     },
+}
+
+SWITCHES = {
     "ml_measurement_start": {
         "name": "Start Micro-Leakage Measurement",
-        "url": "https://appapi.watercryst.com/v1/mlmeasurement/start",
+        "path": "/mlmeasurement/start",
     },
     "self_test": {
         "name": "Start Self Test",
-        "url": "https://appapi.watercryst.com/v1/selftest",
+        "path": "/selftest",
     },
     "water_supply_open": {
         "name": "Open Water Supply",
-        "url": "https://appapi.watercryst.com/v1/watersupply/open",
+        "path": "/watersupply/open",
     },
     "water_supply_close": {
         "name": "Close Water Supply",
-        "url": "https://appapi.watercryst.com/v1/watersupply/close",
+        "path": "/watersupply/close",
     },
 }
 
 async def async_setup_entry(hass, entry, async_add_entities):
     """Set up Watercryst Biocat switches."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    api_key = entry.data["api_key"]
 
     switches = [
-        WatercrystSwitch(coordinator, api_key, switch_type, switch["name"], switch["url"], entry.entry_id)
+        WatercrystStateSwitch(coordinator, switch_type, entry.entry_id)
+        for switch_type in STATE_SWITCHES
+    ]
+    switches += [
+        WatercrystSwitch(
+            coordinator, switch_type, switch["name"], coordinator.client.command_url(switch["path"]), entry.entry_id
+        )
         for switch_type, switch in SWITCHES.items()
     ]
     async_add_entities(switches)
 
+def _is_switch_on(key, value):
+    """Return whether a state value means the switch is on."""
+    if key == "pauseLeakageProtectionUntilUTC":
+        # Pausiert, solange der Zeitpunkt in der Zukunft liegt
+        return leakage_protection_paused(value)
+    return bool(value)
+
+class WatercrystStateSwitch(CoordinatorEntity, SwitchEntity):
+    """Representation of a Watercryst Biocat switch backed by the device state.
+
+    Commands update the switch optimistically and request a debounced
+    refresh of the state endpoint, which confirms or corrects the state.
+    The optimistic state is kept while commands are queued and until that
+    confirmation arrives, so other coordinator updates (e.g. a scheduled
+    poll) do not flip the switch back. If no confirmation arrives, it is
+    dropped after OPTIMISTIC_TIMEOUT seconds.
+    """
+
+    def __init__(self, coordinator, switch_type, entry_id):
+        """Initialize the switch."""
+        super().__init__(coordinator, context=ENDPOINT_STATE)
+        self._switch_type = switch_type
+        self._switch = STATE_SWITCHES[switch_type]
+        self._name = self._switch["name"]
+        self._optimistic_state = None
+        self._pending_commands = 0
+        self._cancel_optimistic_timeout = None
+        self._entry_id = entry_id
+
+    @property
+    def unique_id(self):
+        """Return a unique ID for the switch."""
+        return f"{self._entry_id}_{self._switch_type}"
+
+    @property
+    def name(self):
+        """Return the name of the switch."""
+        return f"Biocat {self._name}"
+
+    @property
+    def is_on(self):
+        """Return the state of the switch."""
+        if self._optimistic_state is not None:
+            return self._optimistic_state
+        key = self._switch["key"]
+        return _is_switch_on(key, getattr(self.coordinator.data, FIELDS[key]))
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Drop the optimistic state once the state refresh after the commands arrives."""
+        if (
+            not self._pending_commands
+            and self.coordinator.state_confirmation
+            and ENDPOINT_STATE in self.coordinator.refreshed_endpoints
+        ):
+            self._drop_optimistic_state()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _drop_optimistic_state(self):
+        """Show the state from the coordinator data again."""
+        self._optimistic_state = None
+        if self._cancel_optimistic_timeout is not None:
+            self._cancel_optimistic_timeout()
+            self._cancel_optimistic_timeout = None
+
+    @callback
+    def _async_optimistic_timeout(self, now):
+        """Drop the optimistic state if the state refresh never confirmed it."""
+        self._cancel_optimistic_timeout = None
+        self._drop_optimistic_state()
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self):
+        """Cancel the optimistic state timeout."""
+        self._drop_optimistic_state()
+        await super().async_will_remove_from_hass()
+
+    async def async_turn_on(self, **kwargs):
+        """Turn the switch on."""
+        await self._async_set_state(True)
+
+    async def async_turn_off(self, **kwargs):
+        """Turn the switch off."""
+        await self._async_set_state(False)
+
+    async def _async_set_state(self, state):
+        """Send the command and update the state optimistically."""
+        _LOGGER.debug("Turning %s %s", "on" if state else "off", self._name)
+        self._optimistic_state = state
+        self._pending_commands += 1
+        self.async_write_ha_state()
+
+        url = self.coordinator.client.command_url(self._switch["on_path"] if state else self._switch["off_path"])
+        try:
+            sent = await self.coordinator.commands.async_send(url)
+        finally:
+            self._pending_commands -= 1
+        if self._pending_commands:
+            # Ein neuerer Befehl bestimmt den Zustand
+            return
+        if not sent:
+            self._drop_optimistic_state()
+            self.async_write_ha_state()
+            return
+        if self._cancel_optimistic_timeout is not None:
+            self._cancel_optimistic_timeout()
+        self._cancel_optimistic_timeout = async_call_later(
+            self.hass, OPTIMISTIC_TIMEOUT, self._async_optimistic_timeout
+        )
+        await self.coordinator.async_request_state_refresh()
+
 class WatercrystSwitch(SwitchEntity):
     """Representation of a Watercryst Biocat switch."""
 
-    def __init__(self, coordinator, api_key, switch_type, name, url, entry_id):
+    def __init__(self, coordinator, switch_type, name, url, entry_id):
         """Initialize the switch."""
         self._coordinator = coordinator
-        self._api_key = api_key
         self._switch_type = switch_type
         self._name = name
         self._url = url
@@ -82,7 +205,8 @@ class WatercrystSwitch(SwitchEntity):
     async def async_turn_on(self, **kwargs):
         """Turn the switch on."""
         _LOGGER.debug("Turning on %s", self._name)
-        await self._send_command()
+        if not await self._send_command():
+            return
         self._is_on = True
         self.async_write_ha_state()
 
@@ -93,12 +217,5 @@ class WatercrystSwitch(SwitchEntity):
         self.async_write_ha_state()
 
     async def _send_command(self):
-        """Send a command to the API."""
-        headers = {"accept": "application/json", "x-api-key": self._api_key}
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(self._url, headers=headers) as response:
-                    response.raise_for_status()
-                    _LOGGER.debug("Successfully sent command to %s", self._url)
-            except Exception as e:
-                _LOGGER.error("Failed to send command to %s: %s", self._url, e)
\ No newline at end of file
+        """Send a command to the API. Return True on success."""
+        return await self._coordinator.commands.async_send(self._url)
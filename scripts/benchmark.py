@@ -0,0 +1,199 @@
+"""Benchmark the polling pipeline against the local mock Watercryst API.
+
+Sets up N config entries in a minimal Home Assistant instance (see
+simulation.py), each with its own WatercrystApiClient pointed at the
+mock, and runs full refreshes of their WatercrystCoordinators: all
+endpoints fetched, merged and written to the entities' states. Reports
+per-cycle latency, requests and state writes per cycle, allocations and
+event-loop blocking time. The domain scheduler lets at most
+--max-concurrent entries poll at the same time.
+With --compare it also compares sequential and concurrent endpoint
+fetching, with --scale it repeats the load run for a growing number of
+entries.
+
+Usage: python scripts/benchmark.py [--entries 10] [--cycles 20] [--latency 0.1] [--compare] [--scale]
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from mock_api import MockWatercrystApi
+from simulation import async_setup_entry, async_simulated_hass
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import callback
+
+from custom_components.watercryst_biocat.api import ENDPOINTS, WatercrystApiClient
+from custom_components.watercryst_biocat.const import MAX_CONCURRENT_POLLS
+from custom_components.watercryst_biocat.scheduler import async_get_scheduler
+
+SCALE_ENTRIES = (1, 10, 50, 100)
+
+
+class LoopMonitor:
+    """Measure how long the event loop is blocked.
+
+    A ticker sleeps for a short interval and records how much later than
+    requested it wakes up.
+    """
+
+    def __init__(self, interval=0.005):
+        """Initialize the monitor."""
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    def start(self):
+        """Start measuring."""
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop measuring."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self):
+        """Record the wake-up lag of the ticker."""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, loop.time() - start - self.interval))
+
+
+async def async_cycle(coordinator):
+    """Run one full refresh of a coordinator, fetching all endpoints."""
+    # Im Betrieb liegen Abfragen weiter auseinander als die Cache-Dauer
+    coordinator.client.invalidate_cache()
+    for endpoint in ENDPOINTS:
+        coordinator.async_request_endpoint_refresh(endpoint)
+    await coordinator.async_refresh()
+
+
+def percentile(values, share):
+    """Return a percentile of a list of values."""
+    values = sorted(values)
+    return values[max(0, int(len(values) * share + 0.5) - 1)]
+
+
+def report(label, durations):
+    """Print summary statistics for a list of durations in ms."""
+    print(
+        f"{label:<24} mean {statistics.mean(durations):8.1f} ms"
+        f"   p50 {percentile(durations, 0.5):8.1f} ms"
+        f"   p95 {percentile(durations, 0.95):8.1f} ms"
+    )
+
+
+async def run_load(api, base_url, entries, cycles, max_concurrent):
+    """Run refreshes of all config entries concurrently."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_simulated_hass(config_dir) as hass:
+            async_get_scheduler(hass).semaphore = asyncio.Semaphore(max_concurrent or entries)
+            writes = 0
+
+            @callback
+            def count_write(event):
+                nonlocal writes
+                writes += 1
+
+            hass.bus.async_listen(EVENT_STATE_CHANGED, count_write)
+            # Die Einrichtung wärmt die Verbindungen auf; danach nur auf Anforderung abfragen
+            coordinators = []
+            for index in range(entries):
+                _, coordinator = await async_setup_entry(
+                    hass,
+                    lambda api_key: WatercrystApiClient(api_key, base_url=base_url),
+                    f"key-{index}",
+                    pref_disable_polling=True,
+                )
+                coordinators.append(coordinator)
+            await hass.async_block_till_done()
+            api.requests.clear()
+            api.not_modified.clear()
+            writes = 0
+
+            monitor = LoopMonitor()
+            durations = []
+            tracemalloc.start()
+            monitor.start()
+            for _ in range(cycles):
+                async def timed(coordinator):
+                    start = time.perf_counter()
+                    await async_cycle(coordinator)
+                    durations.append((time.perf_counter() - start) * 1000)
+
+                await asyncio.gather(*(timed(coordinator) for coordinator in coordinators))
+            await monitor.stop()
+            allocated, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    total_cycles = entries * cycles
+    print(f"{entries} entries x {cycles} cycles, at most {max_concurrent or entries} polling at once")
+    report("cycle latency", durations)
+    print(f"{'requests per cycle':<24} {sum(api.requests.values()) / total_cycles:8.2f}")
+    print(f"{'not modified per cycle':<24} {sum(api.not_modified.values()) / total_cycles:8.2f}")
+    print(f"{'state writes per cycle':<24} {writes / total_cycles:8.2f}")
+    print(f"{'retained per cycle':<24} {allocated / total_cycles / 1024:8.1f} KiB   peak {peak / 1024:8.1f} KiB")
+    print(
+        f"{'event loop blocked':<24} max {max(monitor.lags, default=0) * 1000:8.2f} ms"
+        f"   total {sum(monitor.lags) * 1000:8.1f} ms"
+    )
+
+
+async def run_compare(base_url, cycles):
+    """Compare sequential and concurrent fetching of the three endpoints."""
+    client = WatercrystApiClient("benchmark", base_url=base_url)
+
+    async def sequential():
+        await client.fetch_data()
+        await client.fetch_state_data()
+        await client.fetch_measurements_data()
+
+    try:
+        await client.fetch_all()  # Verbindungen aufwärmen
+        for label, cycle in (("sequential fetch", sequential), ("concurrent fetch", client.fetch_all)):
+            durations = []
+            for _ in range(cycles):
+                client.invalidate_cache()
+                start = time.perf_counter()
+                await cycle()
+                durations.append((time.perf_counter() - start) * 1000)
+            report(label, durations)
+    finally:
+        await client.close()
+
+
+async def main(args):
+    """Run the benchmark."""
+    api = MockWatercrystApi(args.latency, args.jitter, args.error_rate, args.rate_limit_rate)
+    base_url = await api.start()
+    try:
+        if args.compare:
+            await run_compare(base_url, args.cycles)
+        for entries in SCALE_ENTRIES if args.scale else (args.entries,):
+            await run_load(api, base_url, entries, args.cycles, args.max_concurrent)
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10, help="simulated config entries")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.1, help="mock latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="additional random mock latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument(
+        "--max-concurrent", type=int, default=MAX_CONCURRENT_POLLS, help="entries polling at once, 0 for no limit"
+    )
+    parser.add_argument("--compare", action="store_true", help="also compare sequential and concurrent fetching")
+    parser.add_argument("--scale", action="store_true", help=f"run the load for {', '.join(map(str, SCALE_ENTRIES))} entries")
+    asyncio.run(main(parser.parse_args()))
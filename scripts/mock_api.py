@@ -0,0 +1,280 @@
+"""Local stand-in for the Watercryst Biocat cloud API (appapi.watercryst.com).
+
+Serves the polling endpoints used by the coordinator and the command
+endpoints of the switches and buttons, with configurable latency, error
+and HTTP 429 injection. Commands change the simulated device state.
+Device events are served from /v1/events (since parameter) and can be
+acknowledged by id through /v1/ackevent?eventId=...; add_event() raises
+new ones. The polling endpoints send an ETag and answer conditional requests for
+an unchanged body with HTTP 304.
+
+With --push-url the simulated device also pushes its state and
+measurements to a Home Assistant webhook: periodically, and immediately
+after every command.
+
+Usage: python scripts/mock_api.py [--port 8080] [--latency 0.1] [--error-rate 0.05] [--push-url URL]
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from aiohttp import ClientError, ClientSession, web
+
+STATE = {
+    "online": True,
+    "mode": {"id": "WT", "name": "Water Treatment"},
+    "mlState": "idle",
+    "waterProtection": {"absenceModeEnabled": False, "pauseLeakageProtectionUntilUTC": None},
+}
+MEASUREMENTS = {
+    "waterTemp": 14.2,
+    "pressure": 3.8,
+    "flowRate": 0,
+    "lastWaterTapVolume": 2.5,
+    "lastWaterTapDuration": 12,
+}
+
+
+class MockWatercrystApi:
+    """Simulated Watercryst API server."""
+
+    def __init__(
+        self,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        rate_limit_rate=0.0,
+        retry_after=1,
+        flow_probability=0.2,
+        push_url=None,
+        push_interval=5.0,
+    ):
+        """Initialize the server and the simulated device."""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.flow_probability = flow_probability
+        self.requests = Counter()
+        self.not_modified = Counter()
+        self.state = {**STATE, "waterProtection": dict(STATE["waterProtection"])}
+        self.measurements = dict(MEASUREMENTS)
+        self.cumulative = 1234.5
+        self.events = []
+        self.add_event("info", "Selbsttest erfolgreich")
+        self.push_url = push_url
+        self.push_interval = push_interval
+        self.pushes = Counter()
+        self._runner = None
+        self._session = None
+        self._push_task = None
+
+    def make_app(self):
+        """Return the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_get("/v1/statistics/cumulative/daily", self._cumulative)
+        app.router.add_get("/v1/state", self._state)
+        app.router.add_get("/v1/measurements/direct", self._measurements)
+        app.router.add_get("/v1/events", self._events)
+        app.router.add_get("/v1/statistics/cumulative/hourly", self._hourly_statistics)
+        for path in self._commands():
+            app.router.add_post(f"/v1/{path}", self._command)
+        return app
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Start the server and return its base URL."""
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        if self.push_url:
+            self._session = ClientSession()
+            self._push_task = asyncio.get_running_loop().create_task(self._push_periodically())
+        return f"http://{host}:{port}/v1"
+
+    async def stop(self):
+        """Stop the server."""
+        if self._push_task is not None:
+            self._push_task.cancel()
+            self._push_task = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        """Count requests and inject latency, errors and rate limiting."""
+        self.requests[request.path] += 1
+        if not request.headers.get("x-api-key"):
+            return web.Response(status=401)
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        if self.rate_limit_rate and random.random() < self.rate_limit_rate:
+            return web.Response(status=429, headers={"Retry-After": str(self.retry_after)})
+        if self.error_rate and random.random() < self.error_rate:
+            return web.Response(status=503)
+        return await handler(request)
+
+    def _conditional(self, request, body, content_type):
+        """Return the body with an ETag, or HTTP 304 if the client has it already."""
+        etag = f'"{hashlib.sha1(body.encode()).hexdigest()[:16]}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified[request.path] += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(text=body, content_type=content_type, headers={"ETag": etag})
+
+    async def _cumulative(self, request):
+        """Return the cumulative consumption as plain text."""
+        return self._conditional(request, str(round(self.cumulative, 2)), "text/plain")
+
+    async def _hourly_statistics(self, request):
+        """Return hourly cumulative values between from and to (assumed format)."""
+        try:
+            start = datetime.fromisoformat(request.query["from"])
+            end = datetime.fromisoformat(request.query["to"])
+        except (KeyError, ValueError):
+            return web.Response(status=400)
+        hours = int((end - start).total_seconds() // 3600)
+        points = []
+        for index in range(hours):
+            # Rückwärts vom aktuellen Zählerstand, etwa 6 L pro Stunde
+            value = self.cumulative - (hours - index - 1) * 6
+            points.append({"timestamp": (start + timedelta(hours=index)).isoformat(), "value": round(value, 2)})
+        return web.json_response(points)
+
+    async def _state(self, request):
+        """Return the device state."""
+        return self._conditional(request, json.dumps(self.state), "application/json")
+
+    async def _measurements(self, request):
+        """Return the measurements."""
+        return self._conditional(request, json.dumps(self._simulate_measurements()), "application/json")
+
+    def add_event(self, category, title, description=None, timestamp=None):
+        """Raise a device event and return it."""
+        event = {
+            "id": str(len(self.events) + 1),
+            "timestamp": (timestamp or datetime.now(timezone.utc)).isoformat(),
+            "category": category,
+            "title": title,
+            "description": description,
+            "acknowledged": False,
+        }
+        self.events.append(event)
+        return event
+
+    async def _events(self, request):
+        """Return the events at or after since."""
+        events = self.events
+        if since := request.query.get("since"):
+            try:
+                since = datetime.fromisoformat(since)
+            except ValueError:
+                return web.Response(status=400)
+            events = [event for event in events if datetime.fromisoformat(event["timestamp"]) >= since]
+        return self._conditional(request, json.dumps(events), "application/json")
+
+    def _simulate_measurements(self):
+        """Update the measurements, simulating occasional water taps."""
+        flowing = random.random() < self.flow_probability
+        self.measurements["flowRate"] = round(random.uniform(2, 12), 1) if flowing else 0
+        self.measurements["pressure"] = round(3.8 + random.uniform(-0.05, 0.05), 2)
+        if flowing:
+            self.cumulative += self.measurements["flowRate"] / 6
+        return self.measurements
+
+    async def push(self, **payload):
+        """Push an update to the webhook."""
+        try:
+            async with self._session.post(self.push_url, json=payload) as response:
+                self.pushes[response.status] += 1
+        except ClientError as e:
+            self.pushes[type(e).__name__] += 1
+
+    async def _push_periodically(self):
+        """Push the state and the measurements every push interval."""
+        while True:
+            await self.push(state=self.state, measurements=self._simulate_measurements())
+            await asyncio.sleep(self.push_interval)
+
+    def _commands(self):
+        """Return the command paths and their effect on the device state."""
+        protection = self.state["waterProtection"]
+        return {
+            "absence/enable": lambda: protection.update(absenceModeEnabled=True),
+            "absence/disable": lambda: protection.update(absenceModeEnabled=False),
+            "leakageprotection/pause": lambda: protection.update(pauseLeakageProtectionUntilUTC="2099-01-01T00:00:00Z"),
+            "leakageprotection/unpause": lambda: protection.update(pauseLeakageProtectionUntilUTC=None),
+            "mlmeasurement/start": lambda: self.state.update(mlState="measuring"),
+            "selftest": lambda: None,
+            "watersupply/open": lambda: None,
+            "watersupply/close": lambda: None,
+            "ackevent": lambda: None,
+        }
+
+    def _ack_event(self, event_id):
+        """Acknowledge an event, or the newest open one without an id."""
+        open_events = [event for event in self.events if not event["acknowledged"]]
+        for event in reversed(open_events):
+            if event_id is None or event["id"] == event_id:
+                event["acknowledged"] = True
+                return True
+        return event_id is None
+
+    async def _command(self, request):
+        """Apply a command to the simulated device."""
+        path = request.path.removeprefix("/v1/")
+        if path == "ackevent" and not self._ack_event(request.query.get("eventId")):
+            return web.Response(status=404)
+        self._commands()[path]()
+        if self._session is not None:
+            # Zustandsänderungen sofort melden
+            asyncio.get_running_loop().create_task(self.push(state=self.state))
+        return web.Response(status=200)
+
+
+async def main(args):
+    """Run the mock server until interrupted."""
+    api = MockWatercrystApi(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.rate_limit_rate,
+        args.retry_after,
+        push_url=args.push_url,
+        push_interval=args.push_interval,
+    )
+    base_url = await api.start(args.host, args.port)
+    print(f"Mock Watercryst API listening on {base_url}")
+    if args.push_url:
+        print(f"Pushing updates to {args.push_url} every {args.push_interval} s")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="additional random latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After of injected 429 responses")
+    parser.add_argument("--push-url", help="webhook URL to push updates to")
+    parser.add_argument("--push-interval", type=float, default=5.0, help="seconds between pushed updates")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
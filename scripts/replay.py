@@ -0,0 +1,268 @@
+"""Replay recorded Watercryst Biocat API responses through the integration.
+
+Reads the recordings written by the set_recording service (one
+append-only file per endpoint) and runs them through a config entry set
+up in a minimal Home Assistant instance on a simulated clock (see
+simulation.py), much faster than real time. The WatercrystCoordinator
+polls on its own schedule with the given options and its entities write
+their states as in Home Assistant; only the API client is replaced by one
+that answers every request with the newest recorded response at that
+time. A response identical to the one served before counts as not
+modified, like HTTP 304.
+
+Reports the replay speed, polls and not modified responses per endpoint,
+state writes per entity, leak detector and alarm counts and the daily
+consumption, so interval, threshold and consumption changes can be
+compared on the same production-shaped data.
+
+With --synthesize DAYS a recording of the mock API's simulated device is
+written to the directory first.
+
+Usage: python scripts/replay.py DIRECTORY [--interval-state 30] [--threshold-pressure 0.01] [--synthesize 30]
+"""
+import argparse
+import asyncio
+import bisect
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+
+from mock_api import MockWatercrystApi
+from simulation import VirtualClockEventLoop, async_setup_entry, async_simulated_hass
+
+from homeassistant.const import EVENT_STATE_CHANGED, STATE_ON
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.watercryst_biocat.api import (
+    ENDPOINT_CUMULATIVE,
+    ENDPOINT_EVENTS,
+    ENDPOINT_MEASUREMENTS,
+    ENDPOINT_STATE,
+    ENDPOINTS,
+    WatercrystApiClient,
+    WatercrystCommandRejected,
+)
+from custom_components.watercryst_biocat.const import (
+    CONF_INTERVAL_MEASUREMENTS_MAX,
+    CONF_INTERVAL_MEASUREMENTS_MIN,
+    DEFAULT_INTERVAL_MEASUREMENTS_MAX,
+    DEFAULT_INTERVAL_MEASUREMENTS_MIN,
+    DOMAIN,
+    EVENT_ALARM,
+    INTERVAL_OPTIONS,
+    THRESHOLD_OPTIONS,
+)
+from custom_components.watercryst_biocat.models import json_loads
+from custom_components.watercryst_biocat.recording import ResponseRecorder, read_recordings, write_records
+from custom_components.watercryst_biocat.rollups import PERIOD_DAY
+
+_LOGGER = logging.getLogger(__name__)
+
+# Binärsensoren des Leckdetektors, deren Auslösungen gezählt werden
+DETECTOR_SENSORS = ("continuousFlow", "pressureDecay", "unusualConsumption")
+
+
+class RecordedApi:
+    """Recorded responses of all endpoints, answered as of a simulated time."""
+
+    def __init__(self, records):
+        """Index the (timestamp, endpoint, body) records by endpoint."""
+        self._timestamps = {}
+        self._bodies = {}
+        for timestamp, endpoint, body in records:
+            self._timestamps.setdefault(endpoint, []).append(timestamp)
+            self._bodies.setdefault(endpoint, []).append(body)
+        self.records = sum(map(len, self._timestamps.values()))
+        self.start = min((timestamps[0] for timestamps in self._timestamps.values()), default=0.0)
+        self.end = max((timestamps[-1] for timestamps in self._timestamps.values()), default=0.0)
+
+    def body_at(self, endpoint, timestamp):
+        """Return the newest body of an endpoint recorded at or before timestamp."""
+        timestamps = self._timestamps.get(endpoint)
+        if not timestamps or (index := bisect.bisect_right(timestamps, timestamp) - 1) < 0:
+            return None
+        return self._bodies[endpoint][index]
+
+
+class RecordedClient(WatercrystApiClient):
+    """API client answering every request with the recorded response at the current time.
+
+    Only the HTTP requests are replaced; caching, coalescing, timeouts and
+    metrics are those of WatercrystApiClient. The body of a response
+    serves as its ETag, so a body identical to the one served before is
+    answered with the previous result without parsing it again.
+    """
+
+    def __init__(self, api_key, recording):
+        """Initialize the client."""
+        super().__init__(api_key)
+        self._recording = recording
+
+    def _recorded(self, endpoint, parse):
+        """Return the recorded response of an endpoint at the current time, parsed."""
+        if (body := self._recording.body_at(endpoint, time.time())) is None:
+            return None
+        if (validators := self._validators.get(endpoint)) is not None and validators[0] == body:
+            # Wie HTTP 304: nicht erneut dekodieren
+            return validators[2]
+        self.metrics.endpoint(endpoint).bytes += len(body)
+        try:
+            result = parse(body)
+        except ValueError as e:
+            _LOGGER.error("Invalid recorded %s response: %s", endpoint, e)
+            return None
+        self._validators[endpoint] = (body, None, result)
+        return result
+
+    async def fetch_data(self):
+        """Return the recorded cumulative consumption."""
+        return self._recorded(ENDPOINT_CUMULATIVE, float)
+
+    async def _fetch_json(self, endpoint, model, params=None):
+        """Return the recorded JSON document of an endpoint parsed into a model."""
+        return self._recorded(endpoint, lambda body: model(json_loads(body)))
+
+    async def post_command(self, url):
+        """Reject commands; a recording has no device to send them to."""
+        raise WatercrystCommandRejected(f"Commands are not replayed: {url}")
+
+
+class ReplayStats:
+    """State writes, leak detections and alarms counted on the event bus."""
+
+    def __init__(self, hass):
+        """Start counting."""
+        self.writes = Counter()
+        self.detections = Counter()
+        self.alarms = 0
+        self._detectors = {}
+        hass.bus.async_listen(EVENT_STATE_CHANGED, self._state_changed)
+        hass.bus.async_listen(EVENT_ALARM, self._alarm)
+
+    def watch_detectors(self, hass, entry):
+        """Look up the entity ids of the leak detector's binary sensors."""
+        registry = er.async_get(hass)
+        for key in DETECTOR_SENSORS:
+            if entity_id := registry.async_get_entity_id("binary_sensor", DOMAIN, f"{entry.entry_id}_{key}"):
+                self._detectors[entity_id] = key
+
+    @callback
+    def _state_changed(self, event):
+        """Count a state write and a detector turning on."""
+        entity_id = event.data["entity_id"]
+        self.writes[entity_id] += 1
+        if (key := self._detectors.get(entity_id)) is None:
+            return
+        old_state, new_state = event.data["old_state"], event.data["new_state"]
+        if new_state is not None and new_state.state == STATE_ON and (old_state is None or old_state.state != STATE_ON):
+            self.detections[key] += 1
+
+    @callback
+    def _alarm(self, event):
+        """Count a new alarm."""
+        self.alarms += 1
+
+
+async def replay(recording, options, time_zone):
+    """Replay a recording through a new config entry; return its coordinator and the stats."""
+    with tempfile.TemporaryDirectory() as config_dir:
+        async with async_simulated_hass(config_dir, time_zone) as hass:
+            stats = ReplayStats(hass)
+            entry, coordinator = await async_setup_entry(
+                hass, lambda api_key: RecordedClient(api_key, recording), options=options
+            )
+            stats.watch_detectors(hass, entry)
+            # Der Coordinator fragt nach seinem eigenen Zeitplan ab, bis die Aufzeichnung endet
+            await asyncio.sleep(recording.end - time.time())
+            await hass.config_entries.async_unload(entry.entry_id)
+    return coordinator, stats
+
+
+def synthesize(directory, days, seed):
+    """Write a synthetic recording of the mock API's simulated device."""
+    random.seed(seed)
+    api = MockWatercrystApi(flow_probability=0.02)
+    recorder = ResponseRecorder(directory)
+    start = time.time() - days * 86400
+    api.events.clear()
+    for step, timestamp in enumerate(range(int(start), int(start + days * 86400), 5)):
+        measurements = api._simulate_measurements()
+        recorder.record(ENDPOINT_MEASUREMENTS, json.dumps(measurements).encode(), timestamp)
+        if step % 6 == 0:
+            recorder.record(ENDPOINT_STATE, json.dumps(api.state).encode(), timestamp)
+        if step % 12 == 0:
+            if random.random() < 0.002:
+                api.add_event(random.choice(("info", "alarm")), "Simuliertes Ereignis", timestamp=datetime.fromtimestamp(timestamp, timezone.utc))
+            recorder.record(ENDPOINT_EVENTS, json.dumps(api.events[-5:]).encode(), timestamp)
+            recorder.record(ENDPOINT_CUMULATIVE, str(round(api.cumulative, 2)).encode(), timestamp)
+        if step % 17280 == 0:
+            write_records(directory, recorder.take())
+    write_records(directory, recorder.take())
+    print(f"Synthesized {days} days into {directory}")
+
+
+def main(args):
+    """Replay the recordings and print the report."""
+    if args.synthesize:
+        synthesize(args.directory, args.synthesize, args.seed)
+
+    load_start = time.perf_counter()
+    recording = RecordedApi(read_recordings(args.directory))
+    load_time = time.perf_counter() - load_start
+    if not recording.records:
+        sys.exit(f"No recordings in {args.directory}")
+
+    options = {
+        CONF_INTERVAL_MEASUREMENTS_MIN: args.interval_measurements_min,
+        CONF_INTERVAL_MEASUREMENTS_MAX: args.interval_measurements_max,
+    }
+    for option, _ in (*INTERVAL_OPTIONS.values(), *THRESHOLD_OPTIONS.values()):
+        options[option] = getattr(args, option)
+
+    replay_start = time.perf_counter()
+    coordinator, stats = VirtualClockEventLoop(recording.start).run(replay(recording, options, args.time_zone))
+    replay_time = time.perf_counter() - replay_start
+
+    span = recording.end - recording.start
+    print(f"{recording.records} recorded responses over {timedelta(seconds=round(span))}, loaded in {load_time:.2f} s")
+    print(
+        f"{coordinator.cycle_metrics.cycles.count} cycles replayed in {replay_time:.2f} s "
+        f"({span / max(replay_time, 1e-9):,.0f}x real time)"
+    )
+    print()
+    print(f"{'endpoint':<16} {'polls':>8} {'not modified':>13}")
+    for endpoint in ENDPOINTS:
+        outcomes = coordinator.client.metrics.endpoint(endpoint).outcomes
+        print(f"{endpoint:<16} {sum(outcomes.values()):>8} {outcomes['not_modified']:>13}")
+    print()
+    print(f"{'entity':<56} {'state writes':>12}")
+    for entity_id, count in stats.writes.most_common():
+        print(f"{entity_id:<56} {count:>12}")
+    print()
+    print(f"tap events {len(coordinator.history.tap_events)}, new alarms {stats.alarms}, "
+          f"detections {dict(stats.detections) or 'none'}")
+    print("daily consumption (newest first):")
+    for period in coordinator.consumption.rollups.as_dicts(PERIOD_DAY, args.days):
+        print(f"  {period['start'][:10]} {period['volume']:10.1f} L")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="recording directory of a config entry")
+    for option, default in INTERVAL_OPTIONS.values():
+        parser.add_argument(f"--{option.replace('_', '-')}", type=float, default=default)
+    parser.add_argument("--interval-measurements-min", type=float, default=DEFAULT_INTERVAL_MEASUREMENTS_MIN)
+    parser.add_argument("--interval-measurements-max", type=float, default=DEFAULT_INTERVAL_MEASUREMENTS_MAX)
+    for option, default in THRESHOLD_OPTIONS.values():
+        parser.add_argument(f"--{option.replace('_', '-')}", type=float, default=default)
+    parser.add_argument("--time-zone", default="UTC", help="time zone of the consumption periods")
+    parser.add_argument("--days", type=int, default=7, help="days of consumption to print")
+    parser.add_argument("--synthesize", type=int, metavar="DAYS", help="first write a synthetic recording of DAYS days")
+    parser.add_argument("--seed", type=int, default=1, help="random seed of the synthetic recording")
+    main(parser.parse_args())
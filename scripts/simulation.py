@@ -0,0 +1,158 @@
+"""Run Watercryst Biocat config entries in a minimal Home Assistant instance.
+
+Shared by the benchmark and the replay scripts, so both exercise the real
+integration: the config entry is set up as in Home Assistant, with its
+WatercrystCoordinator, the domain scheduler and all entities, and only the
+API client is swapped for the one the script passes in. The instance is
+the one the tests use (pytest-homeassistant-custom-component), without
+HTTP server and recorder; the webhook is registered but never called.
+
+VirtualClockEventLoop runs the instance on a simulated clock: instead of
+waiting for the next timer, the loop advances its clock to it. The
+coordinator's own scheduling then replays days of polling in seconds.
+"""
+import asyncio
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timezone
+import pathlib
+import sys
+import time
+from unittest.mock import patch
+
+REPOSITORY_DIR = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPOSITORY_DIR))
+
+# homeassistant.core vor dem Loader importieren (zirkulärer Import)
+from homeassistant.core import HomeAssistant  # noqa: E402, F401
+from homeassistant import loader  # noqa: E402
+from homeassistant.util import dt as dt_util  # noqa: E402
+from pytest_homeassistant_custom_component.common import (  # noqa: E402
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+from custom_components.watercryst_biocat.const import DOMAIN  # noqa: E402
+
+# Abhängigkeiten, die nur für den Webhook gebraucht werden
+SKIPPED_COMPONENTS = ("http", "webhook")
+
+_monotonic = time.monotonic
+_time = time.time
+
+
+class _VirtualSelector:
+    """Selector that advances the loop's clock instead of blocking until a timer."""
+
+    def __init__(self, selector, loop):
+        """Wrap the selector of a loop."""
+        self._selector = selector
+        self._loop = loop
+
+    def select(self, timeout=None):
+        """Return the ready I/O events, advancing the clock if there are none."""
+        if timeout is None or self._loop.executor_jobs:
+            # Kein Timer oder laufende Executor-Jobs: in Echtzeit auf I/O bzw. deren Ende warten
+            return self._selector.select(timeout)
+        if not (events := self._selector.select(0)) and timeout > 0:
+            self._loop.offset += timeout
+        return events
+
+    def __getattr__(self, name):
+        """Delegate everything else to the wrapped selector."""
+        return getattr(self._selector, name)
+
+
+class VirtualClockEventLoop(asyncio.SelectorEventLoop):
+    """Event loop whose clock jumps to the next timer instead of waiting for it.
+
+    The clock runs at least as fast as real time and starts at start (a
+    Unix timestamp) if given. It only jumps while no executor job runs,
+    so blocking I/O finishes at the simulated time it was started. While the loop runs, time.monotonic(),
+    time.time() and Home Assistant's dt_util.now() and dt_util.utcnow()
+    follow the simulated clock.
+    """
+
+    def __init__(self, start=None):
+        """Initialize the loop."""
+        super().__init__()
+        # Die monotone Uhr startet wie die echte, nur die Wanduhr beginnt bei start
+        self.offset = 0.0
+        self._wall_offset = 0.0 if start is None else start - _time()
+        self.executor_jobs = 0
+        self._selector = _VirtualSelector(self._selector, self)
+
+    def run_in_executor(self, executor, func, *args):
+        """Run a function in an executor, keeping the clock still until it returns."""
+        future = super().run_in_executor(executor, func, *args)
+        self.executor_jobs += 1
+        future.add_done_callback(self._executor_job_done)
+        return future
+
+    def _executor_job_done(self, future):
+        """Count a finished executor job."""
+        self.executor_jobs -= 1
+
+    def time(self):
+        """Return the simulated monotonic time."""
+        return _monotonic() + self.offset
+
+    def wall_time(self):
+        """Return the simulated Unix time."""
+        return _time() + self._wall_offset + self.offset
+
+    @contextmanager
+    def patch_clocks(self):
+        """Let the clocks of the time module and of Home Assistant follow the loop."""
+
+        def now(time_zone=None):
+            return datetime.fromtimestamp(self.wall_time(), time_zone or dt_util.DEFAULT_TIME_ZONE)
+
+        with patch("time.monotonic", self.time), patch("time.time", self.wall_time), patch.object(
+            dt_util, "now", now
+        ), patch.object(dt_util, "utcnow", lambda: datetime.fromtimestamp(self.wall_time(), timezone.utc)):
+            yield
+
+    def run(self, main):
+        """Run a coroutine to completion on the simulated clock."""
+        asyncio.set_event_loop(self)
+        try:
+            with self.patch_clocks():
+                return self.run_until_complete(main)
+        finally:
+            self.run_until_complete(self.shutdown_asyncgens())
+            asyncio.set_event_loop(None)
+            self.close()
+
+
+@asynccontextmanager
+async def async_simulated_hass(config_dir, time_zone="UTC"):
+    """Return a minimal Home Assistant instance that loads this integration."""
+    async with async_test_home_assistant(storage_dir=config_dir) as hass:
+        # Eigene Integrationen laden (wie enable_custom_integrations der Tests)
+        hass.data.pop(loader.DATA_CUSTOM_COMPONENTS)
+        hass.config.set_time_zone(time_zone)
+        hass.config.components.update(SKIPPED_COMPONENTS)
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+async def async_setup_entry(hass, client_factory, api_key="simulated", options=None, pref_disable_polling=False):
+    """Set up a config entry whose API client is created by client_factory(api_key).
+
+    With pref_disable_polling the coordinator only refreshes when asked
+    to. Return the config entry and its coordinator.
+    """
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        title=api_key,
+        data={"api_key": api_key},
+        options=options or {},
+        pref_disable_polling=pref_disable_polling,
+    )
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.scheduler.WatercrystApiClient", client_factory):
+        if not await hass.config_entries.async_setup(entry.entry_id):
+            raise RuntimeError(f"Setting up {api_key} failed")
+    return entry, hass.data[DOMAIN][entry.entry_id]
@@ -0,0 +1 @@
+"""Tests for the Watercryst Biocat integration."""
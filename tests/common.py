@@ -0,0 +1,42 @@
+"""Common helpers for the Watercryst Biocat tests."""
+import asyncio
+
+from custom_components.watercryst_biocat.models import MeasurementsSnapshot, StateSnapshot
+
+STATE = {
+    "online": True,
+    "mode": {"id": "WT", "name": "Water Treatment"},
+    "mlState": "idle",
+    "waterProtection": {"absenceModeEnabled": False, "pauseLeakageProtectionUntilUTC": None},
+}
+MEASUREMENTS = {"waterTemp": 14.2, "pressure": 3.8, "flowRate": 0, "lastWaterTapVolume": 2.5, "lastWaterTapDuration": 12}
+
+
+class FakeApi:
+    """Endpoint results whose fetches can be held back or fail."""
+
+    def __init__(self):
+        """Initialize with fetches neither held back nor failing."""
+        self.release = asyncio.Event()
+        self.release.set()
+        self.started = asyncio.Event()
+        self.fetched = []
+        self.failing = set()
+
+    def hold(self):
+        """Hold back the next fetches until release is set."""
+        self.release.clear()
+        self.started.clear()
+
+    async def fetch_all(self, endpoints):
+        """Return the results of the endpoints once released."""
+        self.fetched.append(endpoints)
+        self.started.set()
+        await self.release.wait()
+        results = {
+            "cumulative": 100.0,
+            "state": StateSnapshot(STATE),
+            "measurements": MeasurementsSnapshot(MEASUREMENTS),
+            "events": [],
+        }
+        return {endpoint: None if endpoint in self.failing else results[endpoint] for endpoint in endpoints}
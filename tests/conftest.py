@@ -0,0 +1,10 @@
+"""Fixtures for the Watercryst Biocat tests."""
+import pytest
+
+pytest_plugins = "pytest_homeassistant_custom_component"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the custom integration in all tests."""
+    yield
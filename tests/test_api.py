@@ -0,0 +1,130 @@
+"""Tests for the Watercryst Biocat API client."""
+from datetime import datetime, timezone
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.watercryst_biocat.api import (
+    ENDPOINT_EVENTS,
+    ENDPOINT_MEASUREMENTS,
+    ENDPOINT_PATHS,
+    STATISTICS,
+    WatercrystApiClient,
+)
+
+MEASUREMENTS = b'{"waterTemp": 14.2, "pressure": 3.8, "flowRate": 0, "lastWaterTapVolume": 2.5, "lastWaterTapDuration": 12}'
+
+
+class FakeApiServer:
+    """Local API server answering with preset bodies and status codes."""
+
+    def __init__(self):
+        """Initialize with no endpoints."""
+        self.responses = {}
+        self.requests = []
+        self.server = None
+        self.base_url = None
+
+    async def _handle(self, request):
+        """Answer a request with the preset response of its path."""
+        self.requests.append(request.path)
+        if (response := self.responses.get(request.path)) is None:
+            raise web.HTTPNotFound()
+        status, body, etag = response
+        if etag is not None and request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(status=status, body=body, headers={"ETag": etag} if etag else None)
+
+    async def start(self):
+        """Start the server."""
+        app = web.Application()
+        app.router.add_route("*", "/{tail:.*}", self._handle)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.base_url = str(self.server.make_url("")).rstrip("/")
+
+
+@pytest.fixture
+async def api_server(socket_enabled):
+    """Return a running FakeApiServer."""
+    server = FakeApiServer()
+    await server.start()
+    yield server
+    await server.server.close()
+
+
+@pytest.fixture
+async def client(api_server):
+    """Return an API client talking to the fake server."""
+    client = WatercrystApiClient("test", base_url=api_server.base_url)
+    yield client
+    await client.close()
+
+
+async def test_not_modified_returns_previous_result(api_server, client):
+    """On HTTP 304 the previous result object comes back unparsed."""
+    api_server.responses[ENDPOINT_PATHS[ENDPOINT_MEASUREMENTS]] = (200, MEASUREMENTS, '"v1"')
+
+    first = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+    client.invalidate_cache()
+    second = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+
+    assert first is not None
+    assert second is first
+    assert client.metrics.endpoint(ENDPOINT_MEASUREMENTS).outcomes == {"success": 1, "not_modified": 1}
+
+
+async def test_changed_response_is_parsed_again(api_server, client):
+    """A new ETag yields a new result object."""
+    path = ENDPOINT_PATHS[ENDPOINT_MEASUREMENTS]
+    api_server.responses[path] = (200, MEASUREMENTS, '"v1"')
+    first = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+
+    api_server.responses[path] = (200, MEASUREMENTS.replace(b"14.2", b"15.0"), '"v2"')
+    client.invalidate_cache()
+    second = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+
+    assert second is not first
+    assert second.water_temp == 15.0
+    assert client.metrics.endpoint(ENDPOINT_MEASUREMENTS).outcomes == {"success": 2}
+
+
+async def test_response_without_validators_is_not_conditional(api_server, client):
+    """Without an ETag every response is parsed as new."""
+    api_server.responses[ENDPOINT_PATHS[ENDPOINT_MEASUREMENTS]] = (200, MEASUREMENTS, None)
+
+    first = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+    client.invalidate_cache()
+    second = (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS]
+
+    assert second is not first
+    assert second.water_temp == first.water_temp
+
+
+async def test_missing_optional_endpoint_is_unsupported(api_server, client, caplog):
+    """HTTP 404 on the events endpoint marks it unsupported without an error log."""
+    assert (await client.fetch_all((ENDPOINT_EVENTS,)))[ENDPOINT_EVENTS] is None
+    client.invalidate_cache()
+    assert (await client.fetch_all((ENDPOINT_EVENTS,)))[ENDPOINT_EVENTS] is None
+
+    assert client.unsupported == {ENDPOINT_EVENTS}
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
+    assert len([record for record in caplog.records if "does not provide" in record.message]) == 1
+
+
+async def test_missing_documented_endpoint_is_an_error(api_server, client, caplog):
+    """HTTP 404 on a documented endpoint stays an error."""
+    assert (await client.fetch_all((ENDPOINT_MEASUREMENTS,)))[ENDPOINT_MEASUREMENTS] is None
+
+    assert not client.unsupported
+    assert [record for record in caplog.records if record.levelname == "ERROR"]
+
+
+async def test_missing_statistics_are_unsupported(api_server, client, caplog):
+    """HTTP 404 on the hourly statistics marks them unsupported without an error log."""
+    start = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    assert await client.fetch_statistics(start, start.replace(day=8)) is None
+
+    assert client.unsupported == {STATISTICS}
+    assert not [record for record in caplog.records if record.levelname == "ERROR"]
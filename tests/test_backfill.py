@@ -0,0 +1,45 @@
+"""Tests for the Watercryst Biocat statistics backfill."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.watercryst_biocat.api import STATISTICS
+from custom_components.watercryst_biocat.const import DOMAIN
+
+# Der Import braucht die Abhängigkeiten des Recorders
+backfill = pytest.importorskip("custom_components.watercryst_biocat.backfill")
+
+
+class FakeClient:
+    """Client whose API does not provide the hourly statistics."""
+
+    def __init__(self):
+        """Initialize with nothing unsupported yet."""
+        self.unsupported = set()
+        self.requests = 0
+
+    async def fetch_statistics(self, start, end):
+        """Answer like the client does on HTTP 404."""
+        self.requests += 1
+        self.unsupported.add(STATISTICS)
+        return None
+
+
+async def test_importer_stops_without_statistics(hass):
+    """The importer stops for good if the API does not provide the statistics."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    client = FakeClient()
+    importer = backfill.WatercrystStatisticsImporter(hass, entry, client)
+    recorder = AsyncMock()
+    recorder.async_add_executor_job.return_value = {}
+
+    with patch("custom_components.watercryst_biocat.backfill.get_instance", return_value=recorder):
+        importer.async_start(entry)
+        await hass.async_block_till_done()
+        assert client.requests == 1
+        assert importer._unsub_interval is None
+
+        await importer.async_import()
+        assert client.requests == 1
@@ -0,0 +1,75 @@
+"""Tests for the Watercryst Biocat circuit breaker."""
+from unittest.mock import patch
+
+from custom_components.watercryst_biocat.breaker import (
+    BREAKER_BACKOFF_BASE,
+    BREAKER_BACKOFF_MAX,
+    BREAKER_FAILURE_THRESHOLD,
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+)
+
+
+def open_breaker(breaker, now=0.0):
+    """Record failures until the breaker opens."""
+    for _ in range(BREAKER_FAILURE_THRESHOLD):
+        assert breaker.allow(now)
+        breaker.record_failure(now)
+
+
+@patch("custom_components.watercryst_biocat.breaker.random.uniform", return_value=1.0)
+def test_opens_after_threshold(_):
+    """The breaker opens after BREAKER_FAILURE_THRESHOLD failures in a row."""
+    breaker = CircuitBreaker()
+    for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+        breaker.record_failure(0.0)
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure(0.0)
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_at == BREAKER_BACKOFF_BASE
+    assert not breaker.allow(BREAKER_BACKOFF_BASE - 1)
+
+
+@patch("custom_components.watercryst_biocat.breaker.random.uniform", return_value=1.0)
+def test_failed_probe_doubles_backoff(_):
+    """A failed probe opens the breaker again with twice the back-off."""
+    breaker = CircuitBreaker()
+    open_breaker(breaker)
+
+    now = breaker.retry_at
+    assert breaker.allow(now)
+    assert breaker.state == STATE_HALF_OPEN
+    breaker.record_failure(now)
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_at == now + 2 * BREAKER_BACKOFF_BASE
+
+
+@patch("custom_components.watercryst_biocat.breaker.random.uniform", return_value=1.0)
+def test_backoff_is_capped(_):
+    """The back-off never exceeds BREAKER_BACKOFF_MAX."""
+    breaker = CircuitBreaker()
+    open_breaker(breaker)
+    for _ in range(10):
+        now = breaker.retry_at
+        assert breaker.allow(now)
+        breaker.record_failure(now)
+
+    assert breaker.retry_at - now == BREAKER_BACKOFF_MAX
+
+
+def test_successful_probe_closes():
+    """A successful probe closes the breaker and resets the back-off."""
+    breaker = CircuitBreaker()
+    open_breaker(breaker)
+    assert breaker.allow(breaker.retry_at)
+
+    breaker.record_success()
+
+    assert breaker.state == STATE_CLOSED
+    assert breaker.failures == breaker.trips == 0
+    assert breaker.allow(0.0)
+    assert breaker.as_dict(0.0)["retry_in"] is None
@@ -0,0 +1,70 @@
+"""Tests for the Watercryst Biocat command queue."""
+import asyncio
+from unittest.mock import patch
+
+from custom_components.watercryst_biocat.api import API_BASE_URL, WatercrystApiError
+from custom_components.watercryst_biocat.commands import WatercrystCommandQueue
+
+SELF_TEST = f"{API_BASE_URL}/selftest"
+OPEN = f"{API_BASE_URL}/watersupply/open"
+CLOSE = f"{API_BASE_URL}/watersupply/close"
+
+
+class FakeClient:
+    """Client recording the commands it sends."""
+
+    def __init__(self, errors=()):
+        """Initialize with the errors to raise for the first commands."""
+        self.errors = list(errors)
+        self.sent = []
+
+    async def post_command(self, url):
+        """Record a command."""
+        self.sent.append(url)
+        if self.errors and (error := self.errors.pop(0)) is not None:
+            raise error
+
+
+@patch("custom_components.watercryst_biocat.commands.COMMAND_MIN_SPACING", 0)
+async def test_last_request_wins(hass):
+    """A pending command is dropped when its opposite is queued."""
+    client = FakeClient()
+    queue = WatercrystCommandQueue(client)
+
+    results = await asyncio.gather(
+        queue.async_send(SELF_TEST),
+        queue.async_send(OPEN),
+        queue.async_send(CLOSE),
+        queue.async_send(OPEN),
+    )
+
+    assert client.sent == [SELF_TEST, OPEN]
+    assert results == [True, False, False, True]
+
+
+@patch("custom_components.watercryst_biocat.commands.COMMAND_MIN_SPACING", 0)
+async def test_duplicate_merged_only_when_last(hass):
+    """Only a duplicate of the last queued command is merged into it."""
+    client = FakeClient()
+    queue = WatercrystCommandQueue(client)
+
+    results = await asyncio.gather(
+        queue.async_send(SELF_TEST),
+        queue.async_send(OPEN),
+        queue.async_send(OPEN),
+        queue.async_send(SELF_TEST),
+    )
+
+    assert client.sent == [SELF_TEST, OPEN, SELF_TEST]
+    assert results == [True, True, True, True]
+
+
+@patch("custom_components.watercryst_biocat.commands.COMMAND_MIN_SPACING", 0)
+@patch("custom_components.watercryst_biocat.commands.COMMAND_BACKOFF_BASE", 0.01)
+async def test_retry(hass):
+    """Transient errors are retried."""
+    client = FakeClient([WatercrystApiError("timeout"), None])
+    queue = WatercrystCommandQueue(client)
+
+    assert await queue.async_send(CLOSE)
+    assert client.sent == [CLOSE, CLOSE]
@@ -0,0 +1,157 @@
+"""Tests for the Watercryst Biocat coordinator."""
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.watercryst_biocat.api import ENDPOINT_EVENTS, ENDPOINT_MEASUREMENTS, ENDPOINT_STATE, ENDPOINTS
+from custom_components.watercryst_biocat.const import DOMAIN
+from custom_components.watercryst_biocat.models import MeasurementsSnapshot
+
+from .common import MEASUREMENTS, FakeApi
+
+async def push_during_poll(hass, endpoint):
+    """Push a water temperature of 99.0 while a poll of an endpoint runs."""
+    api = FakeApi()
+
+    async def fetch_all(client, endpoints):
+        return await api.fetch_all(endpoints)
+
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.data.water_temp == 14.2
+
+        api.hold()
+        coordinator.async_request_endpoint_refresh(endpoint)
+        poll = hass.async_create_task(coordinator.async_refresh())
+        await api.started.wait()
+        coordinator.async_handle_push(
+            {ENDPOINT_MEASUREMENTS: MeasurementsSnapshot({**MEASUREMENTS, "waterTemp": 99.0})}
+        )
+        api.release.set()
+        await poll
+        await hass.async_block_till_done()
+
+        assert coordinator.data.water_temp == 99.0
+        assert hass.states.get("sensor.biocat_wassertemperatur").state == "99.0"
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_push_during_state_poll(hass):
+    """A push arriving while another endpoint is polled is kept."""
+    await push_during_poll(hass, ENDPOINT_STATE)
+
+
+async def test_push_during_measurements_poll(hass):
+    """A polled endpoint does not override a value pushed while it was fetched."""
+    await push_during_poll(hass, ENDPOINT_MEASUREMENTS)
+
+
+async def test_recording_owned_by_starting_entry(hass):
+    """Only the entry that started recording on a shared client stops it."""
+    api = FakeApi()
+
+    async def fetch_all(client, endpoints):
+        return await api.fetch_all(endpoints)
+
+    entries = [MockConfigEntry(domain=DOMAIN, data={"api_key": "test"}) for _ in range(2)]
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        for entry in entries:
+            entry.add_to_hass(hass)
+            assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        first, second = (hass.data[DOMAIN][entry.entry_id] for entry in entries)
+        assert first.client is second.client
+
+        await second.async_set_recording(True)
+        await first.async_set_recording(False)
+        assert second.client.recorder is not None
+
+        assert await hass.config_entries.async_unload(entries[0].entry_id)
+        assert second.client.recorder is not None
+        assert await hass.config_entries.async_unload(entries[1].entry_id)
+        assert second.client.recorder is None
+
+
+async def test_unsupported_endpoint_not_polled(hass):
+    """An endpoint the client found unsupported is neither polled nor stale."""
+    api = FakeApi()
+
+    async def fetch_all(client, endpoints):
+        results = await api.fetch_all(endpoints)
+        if ENDPOINT_EVENTS in results:
+            # Wie nach HTTP 404 auf dem angenommenen Endpunkt
+            client.unsupported.add(ENDPOINT_EVENTS)
+            results[ENDPOINT_EVENTS] = None
+        return results
+
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.last_update_success
+        assert not coordinator.stale_endpoints
+
+        for endpoint in ENDPOINTS:
+            coordinator.async_request_endpoint_refresh(endpoint)
+        await coordinator.async_refresh()
+
+        assert ENDPOINT_EVENTS not in api.fetched[-1]
+        assert coordinator.breakers[ENDPOINT_EVENTS].failures == 0
+        assert coordinator.update_interval.total_seconds() > 5
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_requested_refresh_fetches_all_endpoints(hass):
+    """A refresh requested by the user fetches every endpoint."""
+    api = FakeApi()
+
+    async def fetch_all(client, endpoints):
+        return await api.fetch_all(endpoints)
+
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        fetches = len(api.fetched)
+
+        await coordinator.async_request_refresh()
+        await hass.async_block_till_done()
+
+        assert len(api.fetched) == fetches + 1
+        assert set(api.fetched[-1]) == set(ENDPOINTS)
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+
+async def test_unchanged_result_not_merged_again(hass):
+    """A result identical to the last poll (HTTP 304) does not override newer pushed values."""
+    measurements = MeasurementsSnapshot(MEASUREMENTS)
+
+    async def fetch_all(client, endpoints):
+        return {endpoint: measurements for endpoint in endpoints if endpoint == ENDPOINT_MEASUREMENTS}
+
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.data.water_temp == 14.2
+
+        coordinator.async_handle_push(
+            {ENDPOINT_MEASUREMENTS: MeasurementsSnapshot({**MEASUREMENTS, "waterTemp": 99.0})}
+        )
+        coordinator.async_request_endpoint_refresh(ENDPOINT_MEASUREMENTS)
+        await coordinator.async_refresh()
+
+        assert ENDPOINT_MEASUREMENTS in coordinator.refreshed_endpoints
+        assert coordinator.data.water_temp == 99.0
+        assert not coordinator.changed_fields & {"waterTemp", "pressure"}
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,87 @@
+"""Tests for the Watercryst Biocat event log."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_capture_events
+
+from custom_components.watercryst_biocat.api import ENDPOINT_EVENTS
+from custom_components.watercryst_biocat.const import DOMAIN, EVENT_ALARM
+from custom_components.watercryst_biocat.events import WatercrystEventLog
+from custom_components.watercryst_biocat.models import DeviceEvent
+
+START = datetime(2024, 3, 1, tzinfo=timezone.utc)
+
+
+def event(event_id, minutes=0, category="alarm", acknowledged=False):
+    """Return a device event minutes after START."""
+    return DeviceEvent(event_id, START + timedelta(minutes=minutes), category, f"Ereignis {event_id}", None, acknowledged)
+
+
+def test_events_deduplicated_by_id():
+    """Events returned again at the cursor are not new."""
+    log = WatercrystEventLog()
+
+    assert [e.id for e in log.add([event("1"), event("2", 5)])] == ["1", "2"]
+    assert [e.id for e in log.add([event("2", 5), event("3", 5)])] == ["3"]
+    assert len(log) == 3
+    assert log.cursor == START + timedelta(minutes=5)
+
+
+def test_acknowledgement_taken_over():
+    """An event acknowledged on the device is no longer an open alarm."""
+    log = WatercrystEventLog()
+    log.add([event("1"), event("2", 1, category="info")])
+    assert [e.id for e in log.open_alarms()] == ["1"]
+
+    log.add([event("1", acknowledged=True)])
+
+    assert log.open_alarms() == []
+
+
+def test_oldest_event_dropped_when_full():
+    """Once full, the oldest event is dropped."""
+    log = WatercrystEventLog(size=2)
+    log.add([event("1"), event("2", 1), event("3", 2)])
+
+    assert log.get("1") is None
+    assert [e.id for e in log.latest()] == ["3", "2"]
+
+
+def test_load_restores_events():
+    """Events saved by as_list are restored."""
+    log = WatercrystEventLog()
+    log.add([event("1", acknowledged=True), event("2", 1)])
+
+    restored = WatercrystEventLog()
+    restored.load(log.as_list())
+
+    assert [e.as_dict() for e in restored.latest()] == [e.as_dict() for e in log.latest()]
+    assert not restored.synced
+
+
+async def test_no_alarm_for_history_on_first_sync(hass):
+    """Alarms already present on the first fetch are not fired, new ones once."""
+    responses = [[event("1")], [event("1"), event("2", 5)], [event("2", 5)]]
+
+    async def fetch_all(client, endpoints):
+        return {endpoint: responses[0] if endpoint == ENDPOINT_EVENTS else None for endpoint in endpoints}
+
+    alarms = async_capture_events(hass, EVENT_ALARM)
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+        assert coordinator.events.synced
+        assert coordinator.data.open_alarms == 1
+
+        for _ in range(2):
+            responses.pop(0)
+            coordinator.async_request_endpoint_refresh(ENDPOINT_EVENTS)
+            await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+        assert [alarm.data["id"] for alarm in alarms] == ["2"]
+        assert coordinator.data.open_alarms == 2
+        assert await hass.config_entries.async_unload(entry.entry_id)
@@ -0,0 +1,116 @@
+"""Tests for the Watercryst Biocat consumption rollups."""
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from custom_components.watercryst_biocat.rollups import (
+    PERIOD_DAY,
+    PERIOD_HOUR,
+    PERIOD_MONTH,
+    PERIOD_WEEK,
+    ConsumptionRollups,
+    Rollup,
+    consumption_delta,
+    period_key,
+    period_start,
+)
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def test_consumption_delta():
+    """A decreasing counter counts as reset."""
+    assert consumption_delta(None, 100.0) == 0.0
+    assert consumption_delta(100.0, 102.5) == 2.5
+    assert consumption_delta(100.0, 3.0) == 3.0
+
+
+def test_week_starts_on_monday():
+    """Sunday night and Monday morning are in different weeks."""
+    sunday = datetime(2024, 3, 10, 23, 59)
+    monday = datetime(2024, 3, 11, 0, 0)
+
+    assert period_key(PERIOD_WEEK, monday) == period_key(PERIOD_WEEK, sunday) + 7
+    assert period_start(PERIOD_WEEK, period_key(PERIOD_WEEK, sunday)) == datetime(2024, 3, 4)
+    assert period_start(PERIOD_WEEK, period_key(PERIOD_WEEK, monday)) == monday
+
+
+def test_month_and_year_boundaries():
+    """Months are consecutive keys, also across the turn of the year."""
+    assert period_key(PERIOD_MONTH, datetime(2024, 2, 1)) == period_key(PERIOD_MONTH, datetime(2024, 1, 31, 23, 59)) + 1
+    december = period_key(PERIOD_MONTH, datetime(2023, 12, 31, 23, 59))
+    january = period_key(PERIOD_MONTH, datetime(2024, 1, 1))
+    assert january == december + 1
+    assert period_start(PERIOD_MONTH, december) == datetime(2023, 12, 1)
+    assert period_start(PERIOD_MONTH, january) == datetime(2024, 1, 1)
+
+
+def test_hour_and_day_round_trip():
+    """period_start returns the local start of the period of a key."""
+    local_time = datetime(2024, 2, 29, 17, 45)
+
+    assert period_start(PERIOD_HOUR, period_key(PERIOD_HOUR, local_time)) == datetime(2024, 2, 29, 17)
+    assert period_start(PERIOD_DAY, period_key(PERIOD_DAY, local_time)) == datetime(2024, 2, 29)
+
+
+def test_spring_forward():
+    """The skipped hour has no bucket and the short day is one day."""
+    rollups = ConsumptionRollups()
+    before = datetime(2024, 3, 31, 1, 30, tzinfo=BERLIN)
+    after = datetime(2024, 3, 31, 3, 30, tzinfo=BERLIN)
+    rollups.add(1.0, before)
+    rollups.add(2.0, after)
+
+    assert period_key(PERIOD_HOUR, after) == period_key(PERIOD_HOUR, before) + 2
+    assert rollups.current(PERIOD_HOUR, after) == 2.0
+    assert rollups.current(PERIOD_DAY, after) == 3.0
+
+
+def test_fall_back():
+    """Both passes of the repeated hour add to the same local hour."""
+    rollups = ConsumptionRollups()
+    first = datetime(2024, 10, 27, 2, 30, tzinfo=BERLIN, fold=0)
+    second = datetime(2024, 10, 27, 2, 30, tzinfo=BERLIN, fold=1)
+    rollups.add(1.0, first)
+    rollups.add(2.0, second)
+
+    assert period_key(PERIOD_HOUR, first) == period_key(PERIOD_HOUR, second)
+    assert rollups.current(PERIOD_HOUR, second) == 3.0
+    assert rollups.current(PERIOD_DAY, second) == 3.0
+
+
+def test_new_period_starts_at_zero():
+    """A new day starts at 0 and keeps the previous day in the history."""
+    rollups = ConsumptionRollups()
+    rollups.add(5.0, datetime(2024, 3, 1, 23, 0))
+    rollups.add(0.0, datetime(2024, 3, 2, 0, 5))
+
+    assert rollups.current(PERIOD_DAY, datetime(2024, 3, 2, 0, 5)) == 0.0
+    assert rollups.as_dicts(PERIOD_DAY, before=datetime(2024, 3, 2, 0, 5)) == [
+        {"start": "2024-03-01T00:00:00", "volume": 5.0}
+    ]
+
+
+def test_rollup_reuses_buckets():
+    """A bucket is cleared for a newer period and ignores older ones."""
+    rollup = Rollup(PERIOD_DAY, 3)
+    rollup.add(10, 1.0)
+    rollup.add(13, 2.0)
+    rollup.add(10, 4.0)
+
+    assert rollup.total(10) == 0.0
+    assert rollup.total(13) == 2.0
+    assert rollup.buckets() == [(13, 2.0)]
+
+
+def test_rollup_load_drops_other_sizes():
+    """Stored buckets of another size are dropped."""
+    rollup = Rollup(PERIOD_DAY, 3)
+    rollup.add(10, 1.0)
+
+    restored = Rollup(PERIOD_DAY, 3)
+    restored.load(rollup.as_dict())
+    assert restored.total(10) == 1.0
+
+    resized = Rollup(PERIOD_DAY, 4)
+    resized.load(rollup.as_dict())
+    assert resized.buckets() == []
@@ -0,0 +1,86 @@
+"""Tests for the Watercryst Biocat sensors."""
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.util import dt as dt_util
+
+from custom_components.watercryst_biocat.api import ENDPOINT_EVENTS, ENDPOINT_MEASUREMENTS
+from custom_components.watercryst_biocat.const import DOMAIN
+from custom_components.watercryst_biocat.models import DeviceEvent, MeasurementsSnapshot
+
+from .common import MEASUREMENTS, FakeApi
+
+
+@pytest.fixture
+async def api():
+    """Return the FakeApi polled by the entries."""
+    api = FakeApi()
+
+    async def fetch_all(client, endpoints):
+        return await api.fetch_all(endpoints)
+
+    with patch("custom_components.watercryst_biocat.api.WatercrystApiClient.fetch_all", fetch_all):
+        yield api
+
+
+async def setup_entry(hass):
+    """Set up an entry and return its coordinator."""
+    entry = MockConfigEntry(domain=DOMAIN, data={"api_key": "test"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[DOMAIN][entry.entry_id]
+
+
+async def test_repeated_tap_updates_attribute(hass, api):
+    """A repeated identical tap shows up in the tap events attribute."""
+    coordinator = await setup_entry(hass)
+
+    for flow_rate in (5, 0):
+        coordinator.async_handle_push(
+            {ENDPOINT_MEASUREMENTS: MeasurementsSnapshot({**MEASUREMENTS, "flowRate": flow_rate})}
+        )
+    await hass.async_block_till_done()
+
+    assert len(coordinator.history.tap_events) == 2
+    state = hass.states.get("sensor.biocat_letztes_wasserzapfvolumen")
+    assert len(state.attributes["recent_tap_events"]) == 2
+
+
+async def test_new_event_updates_attribute(hass, api):
+    """A new event updates the recent events even if the open alarm count stays."""
+    coordinator = await setup_entry(hass)
+    event = DeviceEvent("1", datetime(2024, 3, 1, tzinfo=timezone.utc), "info", "Selbsttest")
+
+    coordinator.async_handle_push({ENDPOINT_EVENTS: [event]})
+    await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.biocat_offene_alarme")
+    assert state.state == "0"
+    assert [item["id"] for item in state.attributes["recent_events"]] == ["1"]
+
+
+async def test_stale_value_shows_last_successful_update(hass, api):
+    """A failing endpoint shows when it last succeeded, written only once."""
+    coordinator = await setup_entry(hass)
+    before = dt_util.utcnow()
+    writes = []
+    hass.bus.async_listen(
+        EVENT_STATE_CHANGED,
+        lambda event: writes.append(event) if event.data["entity_id"] == "sensor.biocat_wasserdruck" else None,
+    )
+
+    api.failing.add(ENDPOINT_MEASUREMENTS)
+    for _ in range(2):
+        coordinator.async_request_endpoint_refresh(ENDPOINT_MEASUREMENTS)
+        await coordinator.async_refresh()
+        await hass.async_block_till_done()
+
+    state = hass.states.get("sensor.biocat_wasserdruck")
+    assert state.state == "3.8"
+    assert dt_util.parse_datetime(state.attributes["last_successful_update"]) <= before
+    assert len(writes) == 1